@@ -1,8 +1,38 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import math
 import os
 from PIL import Image, ImageDraw
 
 ARTDIR = os.path.dirname(os.path.normpath(__file__))
 
+# The artwork for the front ends:  the 16 wall tiles and the character,
+# cookie & pill sprites, drawn at any cell size in any theme.
+#
+# A wall tile is named by its mask, the walls it joins (PacmanMap.DIR_MASK:
+# north 1, east 2, south 4 & west 8), written as the bits 1, 2, 4 & 8 in
+# that order; wall-0110.png joins east & south.  wall_pieces describes the
+# tile as a few pieces -- a post, straight runs, interior arcs capping an
+# end or rounding a bend and exterior arcs around corners -- which draw the
+# same way for every mask.  All dimensions are given for a 64 pixel cell
+# and scaled.
+#
+# Each output is a job run in a process pool.  A job is skipped when the
+# hash of this file, the theme and the job is the same as when its output
+# was last written (see MANIFEST).  With --atlas every sprite is also packed
+# into atlas.png with atlas.json giving each sprite's rectangle.
+
+MANIFEST = "manifest.json"
+
+NORTH = 1
+EAST = 2
+SOUTH = 4
+WEST = 8
+
+OPPOSITE = {NORTH: SOUTH, EAST: WEST, SOUTH: NORTH, WEST: EAST}
+
 
 class Colors:
     # https://htmlcolorcodes.com/color-chart/flat-design-color-chart/
@@ -18,354 +48,402 @@ class Dimn:
     WALL_HIGHLIGHTS = 3
 
 
-def draw_wall_0000():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw = ImageDraw.Draw(img)
-    margin = Dimn.WALL_MARGIN
-    draw.ellipse(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
-        outline=Colors.WALL_HIGHLIGHTS,
-        width=Dimn.WALL_HIGHLIGHTS + 1,
-    )
-    margin = Dimn.WALL_MARGIN + 1 * Dimn.WALL_HIGHLIGHTS
-    draw.ellipse(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
-        outline=Colors.WALL_INSET,
-        width=2 * Dimn.WALL_HIGHLIGHTS + 1,
-    )
-    margin = Dimn.WALL_MARGIN + 3 * Dimn.WALL_HIGHLIGHTS
-    draw.ellipse(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
-        outline=Colors.WALL_HIGHLIGHTS,
-        width=Dimn.WALL_HIGHLIGHTS + 1,
+THEMES = {
+    "default": {
+        "wall_highlights": Colors.WALL_HIGHLIGHTS,
+        "wall_inset": Colors.WALL_INSET,
+        "wall_main": Colors.WALL_MAIN,
+        "cookie": "wheat",
+        "paku": "yellow",
+        "fickle": "cyan",
+        "chaser": "red",
+        "ambusher": "pink",
+        "stupid": "orange",
+        "frightened": "blue",
+        "eyes": "white",
+        "pupils": "navy",
+    },
+    "night": {
+        "wall_highlights": "#1B2631",
+        "wall_inset": "#5DADE2",
+        "wall_main": "#2E4053",
+        "cookie": "#D6EAF8",
+        "paku": "#F4D03F",
+        "fickle": "#48C9B0",
+        "chaser": "#E74C3C",
+        "ambusher": "#F1948A",
+        "stupid": "#EB984E",
+        "frightened": "#5B2C6F",
+        "eyes": "white",
+        "pupils": "black",
+    },
+}
+
+# interior arc of an end cap, facing away from the one wall joined
+CAP_ARCS = {NORTH: (0, 180), EAST: (90, 270), SOUTH: (180, 360), WEST: (270, 90)}
+
+# interior arc and exterior (corner) arc of a bend
+BEND_ARCS = {
+    NORTH | EAST: (90, 180),
+    EAST | SOUTH: (180, 270),
+    SOUTH | WEST: (270, 360),
+    WEST | NORTH: (0, 90),
+}
+BEND_CORNERS = {
+    NORTH | EAST: (1, 0),
+    EAST | SOUTH: (1, 1),
+    SOUTH | WEST: (0, 1),
+    WEST | NORTH: (0, 0),
+}
+
+# exterior arcs either side of the branch of a T
+BRANCH_CORNERS = {
+    NORTH: ((0, 0), (1, 0)),
+    EAST: ((1, 0), (1, 1)),
+    SOUTH: ((0, 1), (1, 1)),
+    WEST: ((0, 0), (0, 1)),
+}
+
+# half runs from the center to each side as (axis, from, to) in cells
+HALVES = {
+    NORTH: ("v", 0, 0.5),
+    SOUTH: ("v", 0.5, 1),
+    EAST: ("h", 0.5, 1),
+    WEST: ("h", 0, 0.5),
+}
+
+# paku's mouth faces each of these, at the angle drawn
+PAKU_FACING = {"east": 0, "south": 90, "west": 180, "north": 270}
+GHOSTS = ("fickle", "chaser", "ambusher", "stupid", "frightened")
+
+
+def mask_to_suffix(mask):
+    return "".join(str((mask & bit) // bit) for bit in (NORTH, EAST, SOUTH, WEST))
+
+
+def wall_pieces(mask):
+    """
+    Return the pieces drawing the wall tile of `mask` as tuples naming the
+    piece and its parameters.
+    """
+    joins = [bit for bit in (NORTH, EAST, SOUTH, WEST) if mask & bit]
+    if not joins:
+        return [("post",)]
+    if len(joins) == 1:
+        return [("arc",) + CAP_ARCS[mask], ("straight",) + HALVES[mask]]
+    if mask == EAST | WEST:
+        return [("straight", "h", 0, 1)]
+    if mask == NORTH | SOUTH:
+        return [("straight", "v", 0, 1)]
+    if len(joins) == 2:
+        pieces = [("arc",) + BEND_ARCS[mask]]
+        pieces += [("straight",) + HALVES[bit] for bit in HALVES if mask & bit]
+        pieces.append(("corner",) + BEND_CORNERS[mask])
+        return pieces
+    if len(joins) == 3:
+        branch = next(bit for bit in joins if not mask & OPPOSITE[bit])
+        axis = "v" if branch in (EAST, WEST) else "h"
+        pieces = [("straight", axis, 0, 1)]
+        pieces += [("corner",) + corner for corner in BRANCH_CORNERS[branch]]
+        return pieces
+    return [("corner", 0, 0), ("corner", 0, 1), ("corner", 1, 0), ("corner", 1, 1)]
+
+
+class Pen:
+    # dimensions for a 64 pixel cell scaled to the cell being drawn
+    def __init__(self, img, theme):
+        self.draw = ImageDraw.Draw(img)
+        self.theme = theme
+        self.cell = img.width
+        self.scale = img.width / Dimn.CELL_WIDTH
+
+    def __call__(self, value):
+        return value * self.scale
+
+    def width(self, value):
+        return max(1, round(value * self.scale))
+
+    def box(self, margin, center=None):
+        if center is None:
+            return [margin, margin, self.cell - margin, self.cell - margin]
+        cx, cy = center
+        return [cx - margin, cy - margin, cx + margin, cy + margin]
+
+
+def draw_post(pen):
+    h, theme = Dimn.WALL_HIGHLIGHTS, pen.theme
+    rings = [
+        (0, "wall_highlights", h + 1),
+        (h, "wall_inset", 2 * h + 1),
+        (3 * h, "wall_highlights", h + 1),
+    ]
+    for offset, color, width in rings:
+        pen.draw.ellipse(
+            pen.box(pen(Dimn.WALL_MARGIN + offset)),
+            outline=theme[color],
+            width=pen.width(width),
+        )
+    pen.draw.ellipse(
+        pen.box(pen(Dimn.WALL_MARGIN + 4 * h)),
+        fill=theme["wall_main"],
+        outline=theme["wall_main"],
+        width=pen.width(h + 1),
     )
-    margin = Dimn.WALL_MARGIN + 4 * Dimn.WALL_HIGHLIGHTS
-    draw.ellipse(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
-        fill=Colors.WALL_MAIN,
-        outline=Colors.WALL_MAIN,
-        width=Dimn.WALL_HIGHLIGHTS + 1,
-    )
-
-    img.save(os.path.join(ARTDIR, "wall-0000.png"))
 
 
-def draw_interior_arc_wall(img, start, end):
-    draw = ImageDraw.Draw(img)
-    margin = Dimn.WALL_MARGIN
-    draw.arc(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
-        start,
-        end,
-        fill=Colors.WALL_HIGHLIGHTS,
-        width=Dimn.WALL_HIGHLIGHTS + 1,
-    )
-    margin = Dimn.WALL_MARGIN + 1 * Dimn.WALL_HIGHLIGHTS
-    draw.arc(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
-        start,
-        end,
-        fill=Colors.WALL_INSET,
-        width=2 * Dimn.WALL_HIGHLIGHTS + 1,
-    )
-    margin = Dimn.WALL_MARGIN + 3 * Dimn.WALL_HIGHLIGHTS
-    draw.arc(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
-        start,
-        end,
-        fill=Colors.WALL_HIGHLIGHTS,
-        width=Dimn.WALL_HIGHLIGHTS + 1,
-    )
-    margin = Dimn.WALL_MARGIN + 4 * Dimn.WALL_HIGHLIGHTS
-    draw.pieslice(
-        [margin, margin, Dimn.CELL_WIDTH - margin, Dimn.CELL_WIDTH - margin],
+def draw_arc(pen, start, end):
+    h, theme = Dimn.WALL_HIGHLIGHTS, pen.theme
+    rings = [
+        (0, "wall_highlights", h + 1),
+        (h, "wall_inset", 2 * h + 1),
+        (3 * h, "wall_highlights", h + 1),
+    ]
+    for offset, color, width in rings:
+        pen.draw.arc(
+            pen.box(pen(Dimn.WALL_MARGIN + offset)),
+            start,
+            end,
+            fill=theme[color],
+            width=pen.width(width),
+        )
+    pen.draw.pieslice(
+        pen.box(pen(Dimn.WALL_MARGIN + 4 * h)),
         start,
         end,
-        fill=Colors.WALL_MAIN,
+        fill=theme["wall_main"],
         width=0,
     )
 
-def draw_exterior_arc_wall(img, cx, cy):
-    # This is a little different than the other helper functions:  cx & cy just
-    # indicate which corner centers this arc with each being 0/1.
-
-    centx, centy = None, None
-    start, end = None, None
-    if cx == 0 and cy == 0:
-        centx, centy = 0, 0
-        start, end = 0, 90
-    if cx == 0 and cy == 1:
-        centx, centy = 0, Dimn.CELL_WIDTH
-        start, end = 270, 360
-    if cx == 1 and cy == 0:
-        centx, centy = Dimn.CELL_WIDTH, 0
-        start, end = 90, 180
-    if cx == 1 and cy == 1:
-        centx, centy = Dimn.CELL_WIDTH, Dimn.CELL_WIDTH
-        start, end = 180, 270
-
-    #start, end = 0, 360
-
-    draw = ImageDraw.Draw(img)
-    width = Dimn.WALL_HIGHLIGHTS + 1
-    margin = Dimn.WALL_MARGIN + width
-    draw.arc(
-        [centx - margin, centy - margin, centx + margin, centy + margin],
-        start,
-        end,
-        fill=Colors.WALL_HIGHLIGHTS,
-        width=width,
-    )
-    width = 2 * Dimn.WALL_HIGHLIGHTS + 1
-    margin = Dimn.WALL_MARGIN + 1 * Dimn.WALL_HIGHLIGHTS + width
-    draw.arc(
-        [centx - margin, centy - margin, centx + margin, centy + margin],
-        start,
-        end,
-        fill=Colors.WALL_INSET,
-        width=width,
-    )
-    width = Dimn.WALL_HIGHLIGHTS + 1
-    margin = Dimn.WALL_MARGIN + 3 * Dimn.WALL_HIGHLIGHTS + width
-    draw.arc(
-        [centx - margin, centy - margin, centx + margin, centy + margin],
-        start,
-        end,
-        fill=Colors.WALL_HIGHLIGHTS,
-        width=width,
-    )
 
-    # this arc for the main part of the wall is reduced in width because it
-    # overwrites other corners (imperfect hackery here)
-    width = Dimn.CELL_WIDTH - 2 * Dimn.WALL_MARGIN - 8 * Dimn.WALL_HIGHLIGHTS + 2 - 2 * Dimn.WALL_HIGHLIGHTS
-    margin = Dimn.WALL_MARGIN + 4 * Dimn.WALL_HIGHLIGHTS + width
-    draw.arc(
-        [centx - margin, centy - margin, centx + margin, centy + margin],
-        start,
-        end,
-        fill=Colors.WALL_MAIN,
-        width=width,
-    )
-
-
-def draw_straight_wall(img, xy_swap, left, right):
-    draw = ImageDraw.Draw(img)
-
-    def paired(sym_margin, fill, width):
-        margin = sym_margin
-        draw.line(xy_swap([(left, margin), (right, margin)]), fill=fill, width=width)
-
-        margin = Dimn.CELL_WIDTH - sym_margin
-        draw.line(xy_swap([(left, margin), (right, margin)]), fill=fill, width=width)
-
-    margin = Dimn.CELL_WIDTH / 2 - 0.5
-    draw.line(
-        xy_swap([(left, margin), (right, margin)]),
-        fill=Colors.WALL_MAIN,
-        width=Dimn.CELL_WIDTH - 2 * Dimn.WALL_MARGIN - 8 * Dimn.WALL_HIGHLIGHTS + 2,
+def draw_corner(pen, cx, cy):
+    # an exterior arc centered on the corner (cx, cy) of the cell, each 0/1
+    h, theme = Dimn.WALL_HIGHLIGHTS, pen.theme
+    center = (cx * pen.cell, cy * pen.cell)
+    start = {(0, 0): 0, (0, 1): 270, (1, 0): 90, (1, 1): 180}[cx, cy]
+
+    # the main part of the wall is narrower as it overwrites other corners
+    main = Dimn.CELL_WIDTH - 2 * Dimn.WALL_MARGIN - 10 * h + 2
+    rings = [
+        (0, "wall_highlights", h + 1),
+        (h, "wall_inset", 2 * h + 1),
+        (3 * h, "wall_highlights", h + 1),
+        (4 * h, "wall_main", main),
+    ]
+    for offset, color, width in rings:
+        pen.draw.arc(
+            pen.box(pen(Dimn.WALL_MARGIN + offset + width), center),
+            start,
+            start + 90,
+            fill=theme[color],
+            width=pen.width(width),
+        )
+
+
+def draw_straight(pen, axis, start, end):
+    h, theme = Dimn.WALL_HIGHLIGHTS, pen.theme
+    left, right = start * pen.cell, end * pen.cell
+
+    def line(across, color, width):
+        points = [(left, across), (right, across)]
+        if axis == "v":
+            points = [(y, x) for x, y in points]
+        pen.draw.line(points, fill=theme[color], width=pen.width(width))
+
+    main = Dimn.CELL_WIDTH - 2 * Dimn.WALL_MARGIN - 8 * h + 2
+    line(pen.cell / 2 - 0.5, "wall_main", main)
+
+    stripes = [
+        (Dimn.WALL_MARGIN + 1.0, "wall_highlights", h),
+        (Dimn.WALL_MARGIN + h + 2.5, "wall_inset", 2 * h),
+        (Dimn.WALL_MARGIN + 3 * h + 1.0, "wall_highlights", h),
+    ]
+    for margin, color, width in stripes:
+        line(pen(margin), color, width)
+        line(pen.cell - pen(margin), color, width)
+
+
+PIECES = {
+    "post": draw_post,
+    "arc": draw_arc,
+    "corner": draw_corner,
+    "straight": draw_straight,
+}
+
+
+def draw_wall(pen, mask):
+    for name, *params in wall_pieces(mask):
+        PIECES[name](pen, *params)
+
+
+def draw_consumable(pen, kind):
+    radius = pen.cell / 10 if kind == "cookie" else pen.cell / 4
+    center = (pen.cell / 2, pen.cell / 2)
+    pen.draw.ellipse(pen.box(radius, center), fill=pen.theme["cookie"])
+
+
+def draw_paku(pen, facing=None):
+    box = pen.box(pen(4))
+    if facing is None:
+        pen.draw.ellipse(box, fill=pen.theme["paku"])
+        return
+    angle = PAKU_FACING[facing]
+    pen.draw.pieslice(box, angle + 30, angle + 330, fill=pen.theme["paku"])
+
+
+def draw_ghost(pen, name):
+    theme = pen.theme
+    top, side, bottom = pen(6), pen(6), pen.cell - pen(6)
+    body = theme[name]
+
+    # a dome over a skirt with three points
+    pen.draw.pieslice([side, top, pen.cell - side, pen.cell - top], 180, 360, fill=body)
+    middle = pen.cell / 2
+    pen.draw.rectangle([side, middle, pen.cell - side, bottom - pen(6)], fill=body)
+    step = (pen.cell - 2 * side) / 6
+    for point in range(3):
+        left = side + 2 * point * step
+        pen.draw.polygon(
+            [
+                (left, bottom - pen(6)),
+                (left + step, bottom),
+                (left + 2 * step, bottom - pen(6)),
+            ],
+            fill=body,
+        )
+
+    for eye in (-1, 1):
+        center = (middle + eye * pen(11), middle - pen(6))
+        pen.draw.ellipse(pen.box(pen(7), center), fill=theme["eyes"])
+        if name != "frightened":
+            pupil = (center[0] + pen(2), center[1] + pen(1))
+            pen.draw.ellipse(pen.box(pen(3), pupil), fill=theme["pupils"])
+
+
+def jobs():
+    """
+    Return (output name, drawing) of every sprite; a drawing is the name of
+    a draw function and its parameters.
+    """
+    results = [
+        (f"wall-{mask_to_suffix(mask)}.png", ("wall", mask)) for mask in range(16)
+    ]
+    results.append(("cookie.png", ("consumable", "cookie")))
+    results.append(("pill.png", ("consumable", "pill")))
+    results.append(("paku.png", ("paku", None)))
+    results += [(f"paku-{facing}.png", ("paku", facing)) for facing in PAKU_FACING]
+    results += [(f"ghost-{name}.png", ("ghost", name)) for name in GHOSTS]
+    return results
+
+
+DRAWINGS = {
+    "wall": draw_wall,
+    "consumable": draw_consumable,
+    "paku": draw_paku,
+    "ghost": draw_ghost,
+}
+
+
+def render(job, size, theme, outdir):
+    name, (drawing, param) = job
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    DRAWINGS[drawing](Pen(img, THEMES[theme]), param)
+    img.save(os.path.join(outdir, name))
+    return name
+
+
+def job_hash(source, job, size, theme):
+    params = json.dumps([job, size, theme, THEMES[theme]], sort_keys=True)
+    digest = hashlib.blake2b(source, digest_size=16)
+    digest.update(params.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_atlas(names, size, outdir):
+    columns = math.ceil(math.sqrt(len(names)))
+    rows = math.ceil(len(names) / columns)
+    atlas = Image.new("RGBA", (columns * size, rows * size), (0, 0, 0, 0))
+    index = {"cell": size, "sprites": {}}
+    for number, name in enumerate(names):
+        x, y = number % columns * size, number // columns * size
+        with Image.open(os.path.join(outdir, name)) as sprite:
+            atlas.paste(sprite, (x, y))
+        index["sprites"][os.path.splitext(name)[0]] = [x, y, size, size]
+    atlas.save(os.path.join(outdir, "atlas.png"))
+    with open(os.path.join(outdir, "atlas.json"), "w") as outfile:
+        json.dump(index, outfile, indent=2)
+
+
+def generate(size, theme, outdir, processes=None, atlas=False, force=False):
+    """
+    Draw the outputs in `outdir` which are missing or out of date and
+    return their names.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    with open(os.path.normpath(__file__), "rb") as infile:
+        source = infile.read()
+
+    manifest_path = os.path.join(outdir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as infile:
+            manifest = json.load(infile)
+
+    todo = []
+    hashes = {}
+    for job in jobs():
+        name = job[0]
+        hashes[name] = job_hash(source, job, size, theme)
+        if manifest.get(name) != hashes[name] or not os.path.exists(
+            os.path.join(outdir, name)
+        ):
+            todo.append(job)
+
+    if processes == 1:
+        drawn = [render(job, size, theme, outdir) for job in todo]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(render, job, size, theme, outdir) for job in todo]
+            drawn = [future.result() for future in futures]
+
+    if atlas:
+        names = [name for name, _ in jobs()]
+        hashes["atlas.png"] = job_hash(source, names, size, theme)
+        if (
+            drawn
+            or manifest.get("atlas.png") != hashes["atlas.png"]
+            or not os.path.exists(os.path.join(outdir, "atlas.png"))
+        ):
+            write_atlas(names, size, outdir)
+            drawn.append("atlas.png")
+    else:
+        hashes.pop("atlas.png", None)
+
+    manifest.update(hashes)
+    with open(manifest_path, "w") as outfile:
+        json.dump(manifest, outfile, indent=2, sort_keys=True)
+    return drawn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw the wall tiles and sprites")
+    parser.add_argument("--size", type=int, default=Dimn.CELL_WIDTH, help="cell pixels")
+    parser.add_argument("--theme", default="default", choices=sorted(THEMES))
+    parser.add_argument("--output", default=ARTDIR, help="output directory")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--atlas", action="store_true", help="also write an atlas")
+    parser.add_argument("--force", action="store_true", help="draw everything")
+    args = parser.parse_args()
+
+    drawn = generate(
+        args.size,
+        args.theme,
+        args.output,
+        processes=args.processes,
+        atlas=args.atlas,
+        force=args.force,
     )
-
-    paired(
-        Dimn.WALL_MARGIN + 1.0, fill=Colors.WALL_HIGHLIGHTS, width=Dimn.WALL_HIGHLIGHTS
-    )
-    paired(
-        Dimn.WALL_MARGIN + 1 * Dimn.WALL_HIGHLIGHTS + 2.5,
-        fill=Colors.WALL_INSET,
-        width=2 * Dimn.WALL_HIGHLIGHTS,
-    )
-    paired(
-        Dimn.WALL_MARGIN + 3 * Dimn.WALL_HIGHLIGHTS + 1.0,
-        fill=Colors.WALL_HIGHLIGHTS,
-        width=Dimn.WALL_HIGHLIGHTS,
-    )
-
-
-def draw_hori_wall(img, left, right):
-    def no_op_swap(pairs):
-        return [(x, y) for x, y in pairs]
-
-    draw_straight_wall(img, no_op_swap, left, right)
-
-
-def draw_vert_wall(img, left, right):
-    def swap_swap(pairs):
-        return [(y, x) for x, y in pairs]
-
-    draw_straight_wall(img, swap_swap, left, right)
-
-
-def draw_wall_0101():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_hori_wall(img, 0, Dimn.CELL_WIDTH)
-
-    img.save(os.path.join(ARTDIR, "wall-0101.png"))
-
-
-def draw_wall_0100():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 90, 270)
-    draw_hori_wall(img, Dimn.CELL_WIDTH / 2, Dimn.CELL_WIDTH)
-
-    img.save(os.path.join(ARTDIR, "wall-0100.png"))
-
-
-def draw_wall_0001():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 270, 90)
-    draw_hori_wall(img, 0, Dimn.CELL_WIDTH / 2)
-
-    img.save(os.path.join(ARTDIR, "wall-0001.png"))
-
-
-def draw_wall_1010():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_vert_wall(img, 0, Dimn.CELL_WIDTH)
-
-    img.save(os.path.join(ARTDIR, "wall-1010.png"))
-
-
-def draw_wall_1000():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 0, 180)
-    draw_vert_wall(img, 0, Dimn.CELL_WIDTH / 2)
-
-    img.save(os.path.join(ARTDIR, "wall-1000.png"))
-
-
-def draw_wall_0010():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 180, 360)
-    draw_vert_wall(img, Dimn.CELL_WIDTH / 2, Dimn.CELL_WIDTH)
-
-    img.save(os.path.join(ARTDIR, "wall-0010.png"))
-
-
-def draw_wall_1111():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_exterior_arc_wall(img, 0, 0)
-    draw_exterior_arc_wall(img, 0, 1)
-    draw_exterior_arc_wall(img, 1, 0)
-    draw_exterior_arc_wall(img, 1, 1)
-
-    img.save(os.path.join(ARTDIR, "wall-1111.png"))
-
-
-def draw_wall_0111():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_hori_wall(img, 0, Dimn.CELL_WIDTH)
-    draw_exterior_arc_wall(img, 0, 1)
-    draw_exterior_arc_wall(img, 1, 1)
-
-    img.save(os.path.join(ARTDIR, "wall-0111.png"))
-
-
-def draw_wall_1011():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_vert_wall(img, 0, Dimn.CELL_WIDTH)
-    draw_exterior_arc_wall(img, 0, 0)
-    draw_exterior_arc_wall(img, 0, 1)
-
-    img.save(os.path.join(ARTDIR, "wall-1011.png"))
-
-
-def draw_wall_1101():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_hori_wall(img, 0, Dimn.CELL_WIDTH)
-    draw_exterior_arc_wall(img, 0, 0)
-    draw_exterior_arc_wall(img, 1, 0)
-
-    img.save(os.path.join(ARTDIR, "wall-1101.png"))
-
-
-def draw_wall_1101():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_hori_wall(img, 0, Dimn.CELL_WIDTH)
-    draw_exterior_arc_wall(img, 0, 0)
-    draw_exterior_arc_wall(img, 1, 0)
-
-    img.save(os.path.join(ARTDIR, "wall-1101.png"))
-
-
-def draw_wall_1110():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_vert_wall(img, 0, Dimn.CELL_WIDTH)
-    draw_exterior_arc_wall(img, 1, 0)
-    draw_exterior_arc_wall(img, 1, 1)
-
-    img.save(os.path.join(ARTDIR, "wall-1110.png"))
-
-
-def draw_wall_0110():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 180, 270)
-    draw_vert_wall(img, Dimn.CELL_WIDTH / 2, Dimn.CELL_WIDTH)
-    draw_hori_wall(img, Dimn.CELL_WIDTH / 2, Dimn.CELL_WIDTH)
-    draw_exterior_arc_wall(img, 1, 1)
-
-    img.save(os.path.join(ARTDIR, "wall-0110.png"))
-
-
-def draw_wall_0011():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 270, 360)
-    draw_vert_wall(img, Dimn.CELL_WIDTH / 2, Dimn.CELL_WIDTH)
-    draw_hori_wall(img, 0, Dimn.CELL_WIDTH / 2)
-    draw_exterior_arc_wall(img, 0, 1)
-
-    img.save(os.path.join(ARTDIR, "wall-0011.png"))
-
-
-def draw_wall_1001():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 0, 90)
-    draw_vert_wall(img, 0, Dimn.CELL_WIDTH / 2)
-    draw_hori_wall(img, 0, Dimn.CELL_WIDTH / 2)
-    draw_exterior_arc_wall(img, 0, 0)
-
-    img.save(os.path.join(ARTDIR, "wall-1001.png"))
-
-
-def draw_wall_1100():
-    img = Image.new("RGBA", (Dimn.CELL_WIDTH, Dimn.CELL_WIDTH), (0, 0, 0, 0))
-
-    draw_interior_arc_wall(img, 90, 180)
-    draw_vert_wall(img, 0, Dimn.CELL_WIDTH / 2)
-    draw_hori_wall(img, Dimn.CELL_WIDTH / 2, Dimn.CELL_WIDTH)
-    draw_exterior_arc_wall(img, 1, 0)
-
-    img.save(os.path.join(ARTDIR, "wall-1100.png"))
+    print(f"{len(drawn)} drawn in {args.output}")
 
 
 if __name__ == "__main__":
-    draw_wall_0000()
-    draw_wall_0100()
-    draw_wall_0001()
-    draw_wall_0101()
-    draw_wall_1000()
-    draw_wall_0010()
-    draw_wall_1010()
-    draw_wall_1111()
-    draw_wall_0111()
-    draw_wall_1011()
-    draw_wall_1101()
-    draw_wall_1110()
-    draw_wall_0110()
-    draw_wall_0011()
-    draw_wall_1001()
-    draw_wall_1100()
+    main()
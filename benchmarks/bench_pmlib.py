@@ -0,0 +1,220 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import pmlib
+from pmlib import headless
+from pmlib import maps
+from pmlib import mazegen
+from pmlib import paku_ootb
+
+# Timings of the pmlib hot spots on the shipped maps and on generated mazes of
+# increasing size.  Each case reports the best seconds per call over several
+# repeats.  Results are written as JSON and, given a baseline file from an
+# earlier run on the same machine, cases slower than the baseline by more
+# than the threshold are flagged as regressions (and the exit status is 1).
+#
+#   python benchmarks/bench_pmlib.py --output now.json --baseline base.json
+
+REPEATS = 5
+
+# the least time spent on one repeat of a case
+MIN_SECONDS = 0.05
+
+# cells sampled for the per-location queries
+SAMPLE_CELLS = 500
+
+TICKS = 500
+
+
+def best_of(function, repeats=REPEATS):
+    """
+    Return the least seconds per call of `function` over `repeats` runs of
+    enough calls to take MIN_SECONDS.
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            break
+        calls *= 2 if elapsed * 4 > MIN_SECONDS else 10
+
+    best = elapsed / calls
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def sample_cells(pmmap, count=SAMPLE_CELLS):
+    rng = random.Random(0)
+    blocked = pmmap.blocked_mask(False)
+    width = pmmap.width
+    cells = [
+        maps.Location(index % width, index // width)
+        for index, wall in enumerate(blocked)
+        if not wall
+    ]
+    return rng.sample(cells, min(count, len(cells)))
+
+
+def map_cases(name, text):
+    pmmap = maps.PacmanMap.from_str(text)
+    cells = sample_cells(pmmap)
+    paku = maps.Location(*pmmap.paku_location())
+    first = next(pmmap.adjacent(paku))
+
+    board = pmlib.PacmanBoard()
+    board.load_map(pmmap)
+
+    def parse():
+        maps.PacmanMap.from_str(text)
+
+    def scan():
+        # the grid scan itself; element_locations caches its result
+        pmmap.grid.locations(pmmap.COOKIE)
+
+    def paths():
+        pmmap._path_cache.clear()
+        for _ in pmmap.iter_paths(paku, first, 12):
+            pass
+
+    def unhome():
+        pmmap._path_cache.clear()
+        list(pmmap.iter_ghost_unhome_paths())
+
+    def wall_limits():
+        for cell in cells:
+            board.wall_limit_from(cell, (1, 0))
+
+    def allowable():
+        for cell in cells:
+            board.allowable_directions(cell, False)
+
+    # each case is timed only when asked for
+    yield f"parse/{name}", lambda: best_of(parse, repeats=3)
+    yield f"scan/{name}", lambda: best_of(scan)
+    yield f"iter_paths/{name}", lambda: best_of(paths)
+    yield f"unhome_paths/{name}", lambda: best_of(unhome)
+    yield f"wall_limit_from/{name}", lambda: best_of(wall_limits) / len(cells)
+    yield f"allowable_directions/{name}", lambda: best_of(allowable) / len(cells)
+    yield f"tick/{name}", lambda: tick_seconds(pmmap)
+    yield f"paint/{name}", lambda: paint_seconds(pmmap)
+
+
+def tick_seconds(pmmap, ticks=TICKS):
+    # fresh boards so every repeat plays the same game
+    best = None
+    for _ in range(REPEATS):
+        board = pmlib.PacmanBoard(seed=0)
+        board.load_map(pmmap)
+        board.paku.logic = paku_ootb.wander_logic
+        start = time.perf_counter()
+        result = headless.simulate(board, ticks)
+        seconds = (time.perf_counter() - start) / result.ticks
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def paint_seconds(pmmap):
+    # The Qt front end is optional; the paint loop is skipped without it.
+    try:
+        from PySide6 import QtGui, QtWidgets
+        from qtpacman.main import PacmanWidget
+    except ImportError:
+        return None
+
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication(["bench"])
+    board = pmlib.PacmanBoard()
+    board.load_map(pmmap)
+    widget = PacmanWidget()
+    widget.logic = board
+    widget.resize(pmmap.width * 32, pmmap.height * 32)
+    image = QtGui.QImage(widget.size(), QtGui.QImage.Format_ARGB32)
+
+    def paint():
+        widget.render(image)
+
+    return best_of(paint, repeats=3)
+
+
+def compare(results, baseline, threshold):
+    """
+    Return a list of (case, baseline, now, ratio) for cases slower than the
+    baseline by more than `threshold` (a fraction).
+
+    >>> compare({"a": 2.0, "b": 1.0, "c": 1.0}, {"a": 1.0, "b": 1.0}, 0.25)
+    [('a', 1.0, 2.0, 2.0)]
+    """
+    flagged = []
+    for case, seconds in results.items():
+        before = baseline.get(case)
+        if before and seconds / before > 1 + threshold:
+            flagged.append((case, before, seconds, seconds / before))
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pmlib hot spots")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="*",
+        default=[100, 300],
+        help="edge lengths of generated mazes (e.g. 100 300 1000)",
+    )
+    parser.add_argument("--filter", default=None, help="only cases containing this")
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slow down fraction"
+    )
+    args = parser.parse_args()
+
+    workloads = [("level1", maps.LEVEL1), ("simple", maps.SIMPLE_TEST)]
+    for size in args.sizes:
+        workloads.append((f"{size}x{size}", mazegen.generate(size, size, seed=0)))
+
+    results = {}
+    for name, text in workloads:
+        for case, timer in map_cases(name, text):
+            if args.filter and args.filter not in case:
+                continue
+            seconds = timer()
+            if seconds is None:
+                continue
+            results[case] = seconds
+            print(f"{case:<36} {seconds * 1e6:>14.2f} us", flush=True)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump(report, outfile, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as infile:
+            baseline = json.load(infile)["results"]
+        flagged = compare(results, baseline, args.threshold)
+        for case, before, now, ratio in flagged:
+            print(
+                f"REGRESSION {case}: {before * 1e6:.2f} us -> {now * 1e6:.2f} us"
+                f" ({ratio:.2f}x)"
+            )
+        if flagged:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
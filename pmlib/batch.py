@@ -0,0 +1,130 @@
+import collections
+import multiprocessing
+import time
+from . import core
+from . import maps
+from . import headless
+
+# Run many independent headless games across a process pool.  Each worker
+# parses the map once when it starts and builds every board of its games on
+# that shared map, so a game costs only its own state.  Logic functions are
+# sent to the workers once and must be picklable (module level functions).
+
+BatchResult = collections.namedtuple("BatchResult", ["entrant", "seed", "result"])
+
+# per-worker state set by _init_worker
+_worker = {}
+
+
+class BatchStats:
+    """
+    Aggregate figures over the games returned so far by run_batch.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.games = 0
+        self.ticks = 0
+        self.score = 0
+        self.outcomes = collections.Counter()
+
+    def add(self, result):
+        self.games += 1
+        self.ticks += result.ticks
+        self.score += result.score
+        self.outcomes[result.outcome] += 1
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def ticks_per_second(self):
+        return self.ticks / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "games": self.games,
+            "ticks": self.ticks,
+            "elapsed": self.elapsed,
+            "games_per_second": self.games_per_second,
+            "ticks_per_second": self.ticks_per_second,
+            "mean_score": self.score / self.games if self.games else 0.0,
+            "outcomes": dict(self.outcomes),
+        }
+
+
+def _init_worker(map_string, entrants, max_ticks):
+    _worker["map"] = maps.PacmanMap.from_str(map_string)
+    _worker["entrants"] = entrants
+    _worker["max_ticks"] = max_ticks
+
+
+def _play_game(job):
+    name, seed = job
+    paku_logic, ghost_logic = _worker["entrants"][name]
+
+    board = core.PacmanBoard(seed=seed)
+    board.load_map(_worker["map"])
+    board.paku.logic = paku_logic
+    if ghost_logic is not None:
+        for ghost in board.ghosts:
+            ghost.logic = ghost_logic
+
+    return BatchResult(name, seed, headless.simulate(board, _worker["max_ticks"]))
+
+
+def run_batch(
+    map_string,
+    entrants,
+    seeds,
+    processes=None,
+    chunksize=None,
+    max_ticks=100000,
+    stats=None,
+):
+    """
+    Play one headless game for every seed for every entrant and yield a
+    BatchResult for each as it finishes (in no particular order).
+
+    `entrants` maps a name to a (paku_logic, ghost_logic) pair; a ghost logic
+    of None keeps the board's default.  Pass a BatchStats as `stats` to have
+    it updated as results arrive.  With `processes=1` games run in this
+    process.
+
+    >>> import pmlib
+    >>> from pmlib import paku_ootb
+    >>> entrants = {"wander": (paku_ootb.wander_logic, None)}
+    >>> stats = BatchStats()
+    >>> results = run_batch(pmlib.level1, entrants, [1, 2, 3], processes=1,
+    ...                     max_ticks=50, stats=stats)
+    >>> sorted(r.seed for r in results)
+    [1, 2, 3]
+    >>> stats.games, stats.ticks
+    (3, 150)
+    """
+    jobs = [(name, seed) for name in entrants for seed in seeds]
+    initargs = (map_string, dict(entrants), max_ticks)
+
+    if processes == 1:
+        _init_worker(*initargs)
+        results = map(_play_game, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, initargs)
+        if chunksize is None:
+            workers = processes or multiprocessing.cpu_count()
+            chunksize = max(1, len(jobs) // (workers * 4))
+        results = pool.imap_unordered(_play_game, jobs, chunksize)
+
+    try:
+        for batch_result in results:
+            if stats is not None:
+                stats.add(batch_result.result)
+            yield batch_result
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
@@ -0,0 +1,146 @@
+import math
+
+# Collisions between any number of characters.  Each check buckets the
+# characters by the cell containing them and only compares characters in the
+# same or neighbouring cells, so the cost grows with the number of characters
+# rather than the number of pairs.  Distances are manhattan distances like
+# `pmlib.core.PacmanBoard.is_close`.
+#
+# A swept check also looks at where each character was at the start of the
+# iteration (`Character.previous`) and reports a pair if the two came within
+# range at any moment of their straight line moves, so characters passing
+# through each other between iterations are still caught.  Swept moves must
+# be short enough that such characters end in neighbouring cells.
+
+_floor = math.floor
+
+# moves longer than this are jumps (tunnels, rehoming) and are not swept
+JUMP = 1
+
+
+def _separation(dx, dy):
+    return (dx if dx >= 0 else -dx) + (dy if dy >= 0 else -dy)
+
+
+def swept_separation(start1, end1, start2, end2):
+    """
+    Return the least manhattan distance between two characters moving in
+    straight lines at constant speed from their start to end locations.
+
+    >>> from pmlib.maps import Location
+    >>> swept_separation(Location(1, 1), Location(2, 1), Location(2, 1), Location(1, 1))
+    0.0
+    >>> swept_separation(Location(1, 1), Location(2, 1), Location(1, 2), Location(2, 2))
+    1
+    """
+    # The separation is convex along the moves so its least value is at an
+    # end or where the x or y separation passes zero.
+    sx = start1.x - start2.x
+    sy = start1.y - start2.y
+    ex = end1.x - end2.x
+    ey = end1.y - end2.y
+
+    best = min(_separation(sx, sy), _separation(ex, ey))
+    if (sx < 0) != (ex < 0) and sx != ex:
+        t = sx / (sx - ex)
+        best = min(best, _separation(0, sy + (ey - sy) * t))
+    if (sy < 0) != (ey < 0) and sy != ey:
+        t = sy / (sy - ey)
+        best = min(best, _separation(sx + (ex - sx) * t, 0))
+    return best
+
+
+class CollisionIndex:
+    """
+    Find every pair of characters closer than `close` (which must be less
+    than a cell).
+
+    >>> from pmlib.maps import Location
+    >>> index = CollisionIndex(0.4)
+    >>> locations = [Location(1, 1), Location(1.3, 1), Location(5, 5), Location(5, 5.5)]
+    >>> index.pairs(locations)
+    [(0, 1)]
+
+    Pairs within a group are ignored when groups are given.
+
+    >>> index.pairs(locations, groups=["paku", "ghost", "ghost", "ghost"])
+    [(0, 1)]
+    >>> index.pairs(locations, groups=["ghost", "ghost", "paku", "ghost"])
+    []
+
+    With the locations at the start of the move, characters which crossed
+    each other are found.
+
+    >>> after = [Location(2, 3), Location(2, 3.5)]
+    >>> before = [Location(2, 4), Location(2, 2.5)]
+    >>> index.pairs(after), index.pairs(after, previous=before)
+    ([], [(0, 1)])
+    """
+
+    def __init__(self, close):
+        assert close < 1, "neighbouring cells would not cover the range"
+        self.close = close
+        self.buckets = {}
+
+    def _fill(self, locations):
+        buckets = self.buckets
+        buckets.clear()
+        for index, location in enumerate(locations):
+            cell = (_floor(location.x + 0.5), _floor(location.y + 0.5))
+            found = buckets.get(cell)
+            if found is None:
+                buckets[cell] = [index]
+            else:
+                found.append(index)
+
+    def _candidates(self):
+        # each unordered pair of characters in the same or neighbouring cells
+        # exactly once
+        buckets = self.buckets
+        for (x, y), members in buckets.items():
+            for i, first in enumerate(members):
+                for second in members[i + 1 :]:
+                    yield first, second
+            for other in ((x + 1, y), (x - 1, y + 1), (x, y + 1), (x + 1, y + 1)):
+                neighbours = buckets.get(other)
+                if neighbours is not None:
+                    for first in members:
+                        for second in neighbours:
+                            yield first, second
+
+    def pairs(self, locations, previous=None, groups=None):
+        """
+        Return the sorted (i, j) index pairs, i < j, of the characters at
+        `locations` which collided.  `previous` gives the locations at the
+        start of the move for a swept check and `groups` a label per
+        character to report only pairs from different groups.
+        """
+        if len(locations) < 2:
+            return []
+
+        self._fill(locations)
+
+        close = self.close
+        found = []
+        for first, second in self._candidates():
+            if groups is not None and groups[first] == groups[second]:
+                continue
+
+            loc1 = locations[first]
+            loc2 = locations[second]
+            if previous is None:
+                distance = _separation(loc1.x - loc2.x, loc1.y - loc2.y)
+            else:
+                prev1 = previous[first]
+                prev2 = previous[second]
+                if (loc1 - prev1).manhattan() > JUMP:
+                    prev1 = loc1
+                if (loc2 - prev2).manhattan() > JUMP:
+                    prev2 = loc2
+                distance = swept_separation(prev1, loc1, prev2, loc2)
+
+            if distance < close:
+                found.append((first, second) if first < second else (second, first))
+
+        found.sort()
+        return found
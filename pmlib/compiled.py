@@ -0,0 +1,196 @@
+import array
+import collections
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from .grid import CellGrid
+from .maps import MapParseError, PacmanMap
+from .rays import DIRECTIONS, WallRays
+
+# A compiled map is a PacmanMap saved with everything computed from the map
+# string when it is parsed:  the cell grid, both sets of wall rays with their
+# neighbour masks and the locations of paku, ghosts, gates, pills & cookies.
+# Loading one memory maps the file and the tables read straight from the
+# mapping without being computed or copied.
+#
+# All values are little-endian.  A 16 byte header (magic, version, reserved,
+# width, height) is followed by the element counts and then each table,
+# every one starting on a 4 byte boundary:
+#
+#   grid cells                        uint16 x cells
+#   paku rays for each of DIRECTIONS  uint16 x cells (x 4)
+#   paku blocked, paku neighbours     uint8 x cells (x 2)
+#   the same for the ghost rays
+#   each of ELEMENTS as cell indexes  uint32 x count
+#
+# load_string caches parsed maps in-process by a hash of the map string and,
+# given a directory, in compiled files there too.
+
+MAGIC = b"PMAP"
+# version 2 grid cells hold the wall joins (PacmanMap.DIR_MASK)
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHHII")
+
+# the PacmanMap flags with locations saved
+ELEMENTS = ("PAKU", "GHOST", "GATE", "PILL", "COOKIE")
+_COUNTS = struct.Struct(f"<{len(ELEMENTS)}I")
+
+# parsed maps kept by load_string
+CACHE_SIZE = 16
+_cache = collections.OrderedDict()
+
+
+def _aligned(size):
+    return (size + 3) & ~3
+
+
+def _little(values):
+    if sys.byteorder != "little" and values.itemsize > 1:
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _typed(view, typecode):
+    values = view.cast(typecode)
+    if sys.byteorder != "little" and values.itemsize > 1:
+        values = array.array(typecode, values)
+        values.byteswap()
+    return values
+
+
+def dumps(pmmap):
+    """
+    Return the compiled form of `pmmap` as bytes.
+    """
+    indexes = []
+    for name in ELEMENTS:
+        locations = pmmap.element_locations(getattr(PacmanMap, name))
+        indexes.append(array.array("I", [y * pmmap.width + x for x, y in locations]))
+
+    tables = [array.array("H", pmmap.grid.cells)]
+    for rays in (pmmap.paku_rays, pmmap.ghost_rays):
+        tables.extend(array.array("H", rays.rays[d]) for d in DIRECTIONS)
+        tables.append(bytes(rays.blocked))
+        tables.append(bytes(rays.neighbours))
+    tables.extend(indexes)
+
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, 0, pmmap.width, pmmap.height))
+    out += _COUNTS.pack(*(len(values) for values in indexes))
+    for table in tables:
+        data = _little(table) if isinstance(table, array.array) else table
+        out += bytes(data)
+        out += bytes(_aligned(len(out)) - len(out))
+    return bytes(out)
+
+
+def loads(buffer):
+    """
+    Return a PacmanMap reading its tables from `buffer` (bytes, mmap, ...)
+    which must stay alive and unchanged as long as the map is in use.
+
+    >>> from pmlib.maps import SIMPLE_TEST
+    >>> simple = loads(dumps(PacmanMap.from_str(SIMPLE_TEST)))
+    >>> simple.width, simple.height, simple.paku_location(), simple.ghost_exits()
+    (9, 7, (4, 5), [Location(4, 5)])
+    >>> simple.ray_table(True).distance(4, 5, (0, -1)), len(simple.cookie_locations())
+    (3, 20)
+    """
+    view = memoryview(buffer).cast("B")
+    if len(view) < _HEADER.size + _COUNTS.size:
+        raise MapParseError("not a compiled map")
+    magic, version, _, width, height = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise MapParseError("not a compiled map of a known version")
+    counts = _COUNTS.unpack_from(view, _HEADER.size)
+
+    offset = _aligned(_HEADER.size + _COUNTS.size)
+    cells = width * height
+
+    def take(count, typecode):
+        nonlocal offset
+        size = count * array.array(typecode).itemsize
+        if offset + size > len(view):
+            raise MapParseError("compiled map is truncated")
+        values = _typed(view[offset : offset + size], typecode)
+        offset = _aligned(offset + size)
+        return values
+
+    self = PacmanMap()
+    self.width = width
+    self.height = height
+    grid = take(cells, "H")
+    self.grid = CellGrid.from_buffer(width, height, grid)
+
+    ray_sets = []
+    for _ in range(2):
+        rays = {d: take(cells, "H") for d in DIRECTIONS}
+        blocked = take(cells, "B")
+        neighbours = take(cells, "B")
+        ray_sets.append(WallRays.from_tables(width, height, blocked, rays, neighbours))
+    self.paku_rays, self.ghost_rays = ray_sets
+
+    for name, count in zip(ELEMENTS, counts):
+        self._element_indexes[getattr(PacmanMap, name)] = take(count, "I")
+
+    return self
+
+
+def save(pmmap, path):
+    # write then rename so readers never map a partial file
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as outfile:
+        outfile.write(dumps(pmmap))
+    os.replace(partial, path)
+
+
+def load(path):
+    """
+    Return the PacmanMap compiled in the file at `path`, memory mapped.
+    """
+    with open(path, "rb") as infile:
+        mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(mapped)
+
+
+def map_key(s):
+    return hashlib.blake2b(s.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_string(s, cache_dir=None):
+    """
+    Return the PacmanMap of map string `s`, parsing it only the first time
+    it is seen.  With `cache_dir` compiled maps are also kept in (and read
+    from) that directory.  The same map may be returned to many callers so
+    it must not be modified.
+
+    >>> from pmlib.maps import LEVEL1
+    >>> load_string(LEVEL1) is load_string(LEVEL1)
+    True
+    """
+    key = map_key(s)
+    pmmap = _cache.get(key)
+    if pmmap is not None:
+        _cache.move_to_end(key)
+        return pmmap
+
+    path = None if cache_dir is None else os.path.join(cache_dir, f"{key}.pmap")
+    pmmap = None
+    if path is not None and os.path.exists(path):
+        try:
+            pmmap = load(path)
+        except MapParseError:
+            # compiled by an older version; compile it again
+            pmmap = None
+    if pmmap is None:
+        pmmap = PacmanMap.from_str(s)
+        if path is not None:
+            save(pmmap, path)
+
+    _cache[key] = pmmap
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return pmmap
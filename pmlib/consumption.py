@@ -0,0 +1,104 @@
+import math
+
+# The cookies and pills remaining on one board.  Each grid cell has one byte
+# recording what is left to eat there and running counts are kept so eating,
+# counting and checking for a cleared board never scan or allocate.  What was
+# eaten is appended to `events` for renderers; the board empties it at the
+# start of each iteration.
+
+_floor = math.floor
+
+NOTHING = 0
+COOKIE = 1
+PILL = 2
+
+
+class ConsumptionIndex:
+    """
+    >>> from pmlib.maps import PacmanMap, SIMPLE_TEST
+    >>> index = ConsumptionIndex.from_map(PacmanMap.from_str(SIMPLE_TEST))
+    >>> index.cookie_count, index.pill_count
+    (20, 1)
+    >>> index.consume(4, 1), index.consume(4, 1), index.consume(3, 1)
+    (2, 0, 1)
+    >>> index.cookie_count, index.pill_count, index.is_cleared()
+    (19, 0, False)
+    >>> index.events
+    [(2, 4, 1), (1, 3, 1)]
+    """
+
+    __slots__ = ("width", "cells", "cookie_count", "pill_count", "events")
+
+    def __init__(self, width, cells):
+        self.width = width
+        self.cells = bytearray(cells)
+        self.cookie_count = self.cells.count(COOKIE)
+        self.pill_count = self.cells.count(PILL)
+        self.events = []
+
+    @classmethod
+    def from_map(cls, pmmap):
+        cookies = pmmap.grid.flag_mask(pmmap.COOKIE)
+        pills = pmmap.grid.flag_mask(pmmap.PILL)
+        cells = bytes(c * COOKIE + p * PILL for c, p in zip(cookies, pills))
+        return cls(pmmap.width, cells)
+
+    def copy(self):
+        other = ConsumptionIndex.__new__(ConsumptionIndex)
+        other.width = self.width
+        other.cells = bytearray(self.cells)
+        other.cookie_count = self.cookie_count
+        other.pill_count = self.pill_count
+        other.events = []
+        return other
+
+    def snapshot(self):
+        return bytes(self.cells), self.cookie_count, self.pill_count
+
+    def restore(self, snapshot):
+        # in-place so holders of `cells` see the restored board
+        cells, self.cookie_count, self.pill_count = snapshot
+        self.cells[:] = cells
+        self.events.clear()
+
+    @property
+    def remaining(self):
+        return self.cookie_count + self.pill_count
+
+    def is_cleared(self):
+        return self.cookie_count == 0 and self.pill_count == 0
+
+    def at(self, x, y):
+        return self.cells[y * self.width + x]
+
+    def consume(self, x, y, kind=None):
+        """
+        Eat whatever remains in cell (x, y), or only if it is `kind` when
+        given, and return what was eaten (NOTHING, COOKIE or PILL).
+        """
+        offset = y * self.width + x
+        found = self.cells[offset]
+        if found == NOTHING or (kind is not None and found != kind):
+            return NOTHING
+
+        self.cells[offset] = NOTHING
+        if found == COOKIE:
+            self.cookie_count -= 1
+        else:
+            self.pill_count -= 1
+        self.events.append((found, x, y))
+        return found
+
+    def consume_at(self, location, kind=None):
+        # the cell containing a floating point location (see Location.rounded)
+        x = _floor(location.x + 0.5)
+        y = _floor(location.y + 0.5)
+        return self.consume(x, y, kind)
+
+    def locations(self, kind):
+        width = self.width
+        return [
+            (offset % width, offset // width)
+            for offset, found in enumerate(self.cells)
+            if found == kind
+        ]
@@ -1,15 +1,48 @@
-import time
 import random
 from . import maps
+from .rays import DIRECTIONS
 from . import ghost_ootb
+from . import consumption
+from . import collision
+from . import compiled
+from .scheduler import FixedStepScheduler
+from .trails import Trail
+
+# outcomes of a single game iteration (see PacmanBoard.tick)
+PLAYING = "playing"
+CLEARED = "cleared"
+CAUGHT = "caught"
+LOST = "lost"
+
+
+def _copy_trail(trail, memo):
+    # a trail may be held both in the logic state and as the breadcrumbs (see
+    # ghost_ootb.chase_logic); `memo` copies each one once so it stays shared
+    other = memo.get(id(trail))
+    if other is None:
+        other = memo[id(trail)] = trail.copy()
+    return other
+
+
+def _copy_state(state, memo):
+    # logic state holding a Trail is copied with it since trails change
+    # in-place as they are walked
+    return {
+        key: _copy_trail(value, memo) if value.__class__ is Trail else value
+        for key, value in state.items()
+    }
 
 
 class Character:
-    def __init__(self):
+    def __init__(self, logic=None):
         self.location = None
         self.state = {}
+        self.breadcrumbs = Trail()
 
-        self.logic = None
+        # location at the start of the current iteration for interpolation
+        self.previous = maps.Location(0, 0)
+
+        self.logic = logic
 
 
 class PacmanBoard:
@@ -39,24 +72,63 @@ class PacmanBoard:
     MOVE_DISTANCE = 0.08
     LOOP_SLEEP_SECONDS = 0.008
 
+    # renders happen at display rate independent of the iteration cadence
+    RENDER_SECONDS = 1 / 60
+
     #  Fickle, Chaser, Ambusher and Stupid
     #  Inky, Blinky, Pinky and Clyde
     GHOST_COUNT = 4
 
-    def __init__(self):
+    # the arcade values
+    COOKIE_POINTS = 10
+    PILL_POINTS = 50
+    GHOST_POINTS = 200
+
+    # a pill empowers paku for 6 seconds
+    EMPOWERED_ITERATIONS = 750
+
+    def __init__(self, seed=None):
         self.map = None
 
-        self.cookies = []
-        self.pills = []
+        # Random streams:  `random` for the rules and ghost logic and
+        # `paku_random` for paku logic.  Keeping paku's draws apart means a
+        # game replays exactly from its seed and paku's moves alone (see
+        # pmlib.replay).
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.paku_random = random.Random(seed ^ 0x5A5A5A5A)
 
+        # remaining cookies & pills; see the cookies and pills properties
+        self.consumables = None
+
+        # iterations played
+        self.ticks = 0
+
+        self.score = 0
         self.retries = 3
         self.empowered = False
+        self.empowered_remaining = 0
 
         self.paku = None
         self.ghosts = None
 
+        # fraction of an iteration elapsed at render time (see play)
+        self.render_alpha = 1.0
+
+        self.collisions = collision.CollisionIndex(self.COLLISION_CLOSE)
+
     def load_from_string(self, s):
-        self.map = maps.PacmanMap.from_str(s)
+        # maps are parsed once per process (see pmlib.compiled)
+        self.load_map(compiled.load_string(s))
+
+    def load_map(self, pmmap):
+        """
+        Set up a game on an already parsed map.  The map is not modified so
+        one map may be shared by many boards.
+        """
+        self.map = pmmap
 
         self.paku = Character()
 
@@ -64,146 +136,226 @@ class PacmanBoard:
         self.ghosts = [Character(logic=glogic) for _ in range(self.GHOST_COUNT)]
 
         # record cookie and pill locations
-        self.cookies = self.map.cookie_locations()
-        self.pills = self.map.pill_locations()
+        self.consumables = consumption.ConsumptionIndex.from_map(self.map)
 
         # record paku & ghost points
         self.reset_characters()
 
-    def is_cleared(self):
-        return len(self.cookies + self.pills) > 0
+    @property
+    def cookies(self):
+        return self.consumables.locations(consumption.COOKIE)
 
-    @classmethod
-    def is_close(cls, loc1, loc2):
-        return (loc1 - loc2).manhattan() < cls.COLLISION_CLOSE
+    @property
+    def pills(self):
+        return self.consumables.locations(consumption.PILL)
 
-    def wall_limit_from(self, loc, direction):
-        walls = self.map.WALL | self.map.GATE
+    @property
+    def eaten(self):
+        """
+        The (kind, x, y) of each cookie and pill eaten this iteration.
+        """
+        return self.consumables.events
 
-        current = loc.rounded()
-        assert self.map.get[current] & walls == 0, "invalid location in wall"
+    def is_cleared(self):
+        return self.consumables.is_cleared()
 
-        delta = loc - current
+    def consume_cookie(self, location):
+        if self.consumables.consume_at(location, consumption.COOKIE):
+            self.score += self.COOKIE_POINTS
 
-        limit = None
+    def consume_pill(self, location):
+        if self.consumables.consume_at(location, consumption.PILL):
+            self.score += self.PILL_POINTS
+            self.empowered = True
+            self.empowered_remaining = self.EMPOWERED_ITERATIONS
 
+    @classmethod
+    def is_close(cls, loc1, loc2):
+        return (loc1 - loc2).manhattan() < cls.COLLISION_CLOSE
+
+    def _limit_towards(self, rays, current, delta, direction):
         # If with-in CORNER_CORRECT perpendicular to direction then no need
         # to check contact with diagonal cell, in that case the character
         # motion code will first center on the perpendicular travel route.
 
-        if delta.manhattan() > self.CORNER_CORRECT and delta.is_perpendicular(
-            direction
-        ):
-            diagonal = current + delta.unit() + direction
-            if self.map[diagonal] & walls:
-                limit = current + direction
+        dx, dy = direction[0], direction[1]
+
+        if dx == 0 and abs(delta[0]) > self.CORNER_CORRECT:
+            side = 1 if delta[0] > 0 else -1
+            if rays.is_blocked_towards(current.x, current.y, side, dy):
+                return current + direction
+        if dy == 0 and abs(delta[1]) > self.CORNER_CORRECT:
+            side = 1 if delta[1] > 0 else -1
+            if rays.is_blocked_towards(current.x, current.y, dx, side):
+                return current + direction
+
+        steps = rays.distance(current.x, current.y, direction)
+        return current + (dx * steps, dy * steps)
+
+    def wall_limit_from(self, loc, direction, as_ghost=False):
+        """
+        Return the first blocked cell reached travelling in `direction` from
+        `loc`.  This is answered from the map's precomputed ray tables.
+
+        >>> board = PacmanBoard()
+        >>> board.map = maps.PacmanMap.from_str(maps.SIMPLE_TEST)
+        >>> board.wall_limit_from(maps.Location(4, 5), (1, 0))
+        Location(8, 5)
+        >>> board.wall_limit_from(maps.Location(4.3, 5), (0, -1))
+        Location(4, 4)
+        >>> board.wall_limit_from(maps.Location(1.1, 5), (-1, 0))
+        Location(0, 5)
+        """
+        rays = self.map.ray_table(as_ghost)
 
-        if limit is None:
-            step = current
-            while True:
-                step = step + direction
-                if self.map[step] & walls:
-                    limit = step
-                    break
+        current = loc.rounded()
+        assert not rays.is_blocked(current.x, current.y), "invalid location in wall"
 
-        return limit
+        return self._limit_towards(rays, current, loc - current, direction)
 
     def allowable_directions(self, loc, as_ghost):
-        # TODO: re-use wall_limit_from
-
-        dirs = [(0, 1), (1, 0), (-1, 0), (0, -1)]
-
-        walls = self.map.WALL | (self.map.GATE if not as_ghost else 0)
+        """
+        Return a dictionary mapping each direction to the first blocked cell
+        in that direction.
+
+        >>> board = PacmanBoard()
+        >>> board.map = maps.PacmanMap.from_str(maps.SIMPLE_TEST)
+        >>> limits = board.allowable_directions(maps.Location(4, 5), True)
+        >>> limits[(0, -1)], limits[(-1, 0)]
+        (Location(4, 2), Location(0, 5))
+        """
+        rays = self.map.ray_table(as_ghost)
 
         current = loc.rounded()
-        assert self.map.get[current] & walls == 0, "cannot go any direction _in_ a wall"
+        assert not rays.is_blocked(
+            current.x, current.y
+        ), "cannot go any direction _in_ a wall"
 
         delta = loc - current
 
-        results = {}
-
-        for direction in dirs:
-            limit = None
-
-            # If with-in CORNER_CORRECT perpendicular to direction then no need
-            # to check contact with diagonal cell, in that case the character
-            # motion code will first center on the perpendicular travel route.
-
-            if direction[0] == 0 and abs(delta[0]) > self.CORNER_CORRECT:
-                delta1 = 1 if delta[0] > 0 else -1
-                diagonal = current + (delta1, direction[1])
-                if self.map[diagonal] & walls:
-                    limit = current + direction
-            if direction[1] == 0 and abs(delta[1]) > self.CORNER_CORRECT:
-                delta1 = 1 if delta[1] > 0 else -1
-                diagonal = current + (direction[0], delta1)
-                if self.map[diagonal] & walls:
-                    limit = current + direction
-
-            if limit is None:
-                step = current
-                while True:
-                    step = step + direction
-                    if self.map[step] & walls:
-                        limit = step
-                        break
-
-            # compare to limit
-            results[direction] = limit
-
-        return results
-
-    def max_parallel(self, direction, distance):
-        # TODO:  implement but details our unsatisfactory
-
-        # return the largest vector in the direction `direction` which is legal
-        # and does not exceed length `distance`.
-        pass
-
-    def navigate(self, location, direction):
-        # TODO:  must support wrap-around
-
-        grid_corner = location.rounded()
-        delta = grid_corner - location
+        return {
+            direction: self._limit_towards(rays, current, delta, direction)
+            for direction in DIRECTIONS
+        }
+
+    def wrapped_location(self, location):
+        """
+        Bring a location which has left the map through a tunnel back on to
+        the opposite side.  The location is updated in-place.
+        """
+        width, height = self.map.width, self.map.height
+        if location.x < -0.5:
+            location.x += width
+        elif location.x >= width - 0.5:
+            location.x -= width
+        if location.y < -0.5:
+            location.y += height
+        elif location.y >= height - 0.5:
+            location.y -= height
+        return location
+
+    def navigate(self, location, target):
+        """
+        Return the location one move toward the center of the adjacent cell
+        `target`.
+
+        >>> board = PacmanBoard()
+        >>> board.map = maps.PacmanMap.from_str(maps.SIMPLE_TEST)
+        >>> board.navigate(maps.Location(4.04, 5), maps.Location(3, 5))
+        Location(3.96, 5)
+        >>> board.navigate(maps.Location(4.04, 5), maps.Location(4, 4))
+        Location(4.0, 5)
+        >>> board.navigate(maps.Location(0, 1), maps.Location(8, 1))
+        Location(-0.08, 1)
+        """
+
+        # the target may be across a tunnel
+        width, height = self.map.width, self.map.height
+        dx = target[0] - location.x
+        dy = target[1] - location.y
+        if dx > width / 2:
+            dx -= width
+        elif dx < -width / 2:
+            dx += width
+        if dy > height / 2:
+            dy -= height
+        elif dy < -height / 2:
+            dy += height
 
         # We may go perpendicular to direction prior to going in the direction
         # `direction`; we never go two directions in one turn.  a character may
         # lose a fragment of cadence in a turn.
 
-        if delta.manhattan() > self.EPSILON and delta.is_perpendicular(direction):
-            # first, complete to corner
-            offset = self.max_parallel(delta, self.MOVE_DISTANCE)
-            return location + offset
+        distance = self.MOVE_DISTANCE
+        horizontal = abs(dx) >= abs(dy)
+        if horizontal and abs(dy) > self.EPSILON:
+            # first, complete to the horizontal track
+            move = (0, max(-distance, min(distance, dy)))
+        elif not horizontal and abs(dx) > self.EPSILON:
+            move = (max(-distance, min(distance, dx)), 0)
+        elif horizontal:
+            move = (max(-distance, min(distance, dx)), 0)
         else:
-            offset = self.max_parallel(direction, self.MOVE_DISTANCE)
-            # TODO:  snap to axis of travel
-            return location + offset
-
-    def follow_breadcrumbs(self, current, breadcrumbs):
-        assert len(breadcrumbs) >= 1
+            move = (0, max(-distance, min(distance, dy)))
+
+        return self.wrapped_location(location + move)
+
+    def follow_breadcrumbs(self, current, trail):
+        """
+        Return the location one move along the Trail `trail`, advancing the
+        trail past each crumb reached.  A replanning trail becomes due when
+        the crumb reached is a junction.
+        """
+        crumb = trail.next
+        new_loc = self.navigate(current, crumb)
+        if (new_loc - crumb).manhattan() < self.EPSILON:
+            trail.advance()
+            if trail.replan:
+                graph = self.map.corridor_graph(True)
+                trail.due = graph.is_junction(graph.index(crumb))
+
+        return new_loc
+
+    def collided_ghosts(self):
+        """
+        Return the ghosts which met paku during this iteration's moves.
+        """
+        characters = [self.paku] + self.ghosts
+        pairs = self.collisions.pairs(
+            [c.location for c in characters],
+            previous=[c.previous for c in characters],
+            groups=[c is self.paku for c in characters],
+        )
+        return [characters[j] for i, j in pairs if i == 0]
 
-        new_loc = self.navigate(current, breadcrumbs[0])
-        if self.is_close(new_loc, breadcrumbs[0]):
-            breadcrumbs = breadcrumbs[1:]
+    def is_collided(self):
+        return bool(self.collided_ghosts())
 
-        return new_loc, breadcrumbs
+    def _move_character(self, character, direction, as_ghost=False):
+        if direction is None:
+            return
 
-    def is_collided(self):
-        ploc = self.paku.location
-        return any(self.is_close(ploc, ghost.location) for ghost in self.ghosts)
+        location = character.location
+        current = location.rounded()
 
-    def _move_character(self, character, direction):
-        # TODO:  this appears to be redundant with navigate
+        # inside the corner tolerance the character is pushed on to the track
+        # for the direction of travel
+        if direction[0] == 0 and abs(location.x - current.x) <= self.CORNER_CORRECT:
+            location.x = current.x
+        if direction[1] == 0 and abs(location.y - current.y) <= self.CORNER_CORRECT:
+            location.y = current.y
 
-        limit = self.wall_limit_from(character.location, direction)
+        limit = self.wall_limit_from(location, direction, as_ghost)
 
-        distance = self.MOVE_DISTANCE
-        if (limit - character.location).manhattan() < self.MOVE_DISTANCE:
-            distance = (limit - character.location).manhattan()
+        # travel stops at the center of the cell before the limit
+        room = (limit.x - location.x) * direction[0]
+        room += (limit.y - location.y) * direction[1]
+        distance = min(room - 1, self.MOVE_DISTANCE)
+        if distance <= 0:
+            return
 
-        character.location += maps.Location(
-            distance * direction[0], distance * direction[1]
-        )
+        location.shift(distance * direction[0], distance * direction[1])
+        self.wrapped_location(location)
 
     def play_paku(self):
         dir_togo = self.paku.logic(self, self.paku.location, self.paku.state)
@@ -213,79 +365,291 @@ class PacmanBoard:
         self.consume_cookie(self.paku.location)
         self.consume_pill(self.paku.location)
 
+        if self.empowered:
+            self.empowered_remaining -= 1
+            if self.empowered_remaining <= 0:
+                self.empowered = False
+
     def play_ghost(self, ghost):
         # Note that ghost unhoming shall be prepared in rehome_ghost
 
-        # TODO:  does a logic function really just return breadcrumbs
-
-        if ghost.breadcrumbs and ghost.breadcrumbs[0][0] == "recompute":
-            dir_togo = ghost.logic(self, ghost.location, ghost.state)
-
-        if ghost.breadcrumbs:
-            new_loc, bc = self.follow_breadcrumbs(ghost.location, ghost.breadcrumbs)
+        # Logic is consulted when the trail runs out or is due for replanning;
+        # it returns a direction to move or a Trail to follow.
+        trail = ghost.breadcrumbs
+        if trail and not trail.due:
+            ghost.location = self.follow_breadcrumbs(ghost.location, trail)
+            return
 
-            ghost.location = new_loc
+        plan = ghost.logic(self, ghost.location, ghost.state)
 
-            ghost.breadcrumbs = bc
+        if isinstance(plan, Trail):
+            ghost.breadcrumbs = plan
+            plan.due = False
+            if plan:
+                ghost.location = self.follow_breadcrumbs(ghost.location, plan)
+            return
 
-        dir_togo = ghost.logic(self, ghost.location, ghost.state)
-
-        self._move_character(ghost, dir_togo)
+        if trail:
+            ghost.breadcrumbs = Trail()
+        self._move_character(ghost, plan, as_ghost=True)
 
     def rehome_ghost(self, ghost):
+        r"""
+        Put `ghost` back in a ghost box with the trail out to the nearest
+        exit it can reach.
+
+        >>> board = PacmanBoard(seed=0)
+        >>> board.load_from_string("\n".join([
+        ...     "+---------+",
+        ...     "|oooo@oooo|",
+        ...     "|o+-=-+--+|",
+        ...     "|o|xxx|xx||",
+        ...     "|o+---+-=+|",
+        ...     "|oooooo+o||",
+        ...     "+---------+",
+        ... ]))
+        >>> ghost = board.ghosts[0]
+        >>> targets = set()
+        >>> for _ in range(20):
+        ...     board.rehome_ghost(ghost)
+        ...     targets.add(ghost.breadcrumbs.target)
+        >>> sorted(targets, key=tuple)
+        [Location(4, 1), Location(8, 5)]
+        """
+
         def random_between(l1, l2):
             assert (l1 - l2).manhattan() == 1
 
-            offset = random.random()
+            offset = self.random.random()
             delta = l1 - l2
 
-            return l1 + maps.Location(offset * delta[0], offset * delta[1])
+            return l2 + maps.Location(offset * delta[0], offset * delta[1])
 
         pairs = []
         ghlocs = [maps.Location(*g) for g in self.map.ghost_locations()]
         for gloc1 in ghlocs:
             for gloc2 in ghlocs:
                 if (gloc1 - gloc2).manhattan() == 1:
-                    pairs.append(gloc1, gloc2)
-
-        ghost.location = random_between(*random.choose(pairs))
-        # TODO: implement ghost unhoming by means of setting the breadcrumb property
+                    pairs.append((gloc1, gloc2))
+
+        ghost.location = random_between(*self.random.choice(pairs))
+        ghost.state = {}
+
+        # the bread-crumb trail out of the box leads to the nearest exit
+        fields = self.map.distance_fields(as_ghost=True)
+        cell = ghost.location.rounded()
+        # exits in another part of the maze have no distance
+        distances = {out: fields.distance(cell, out) for out in self.map.ghost_exits()}
+        exits = [out for out, steps in distances.items() if steps is not None]
+        if exits:
+            target = min(exits, key=distances.get)
+            ghost.breadcrumbs = Trail(fields.trail(cell, target))
+        else:
+            ghost.breadcrumbs = Trail()
 
     def reset_characters(self):
         for ghost in self.ghosts:
             self.rehome_ghost(ghost)
 
         self.paku.location = maps.Location(*self.map.paku_location())
+        self.paku.state = {}
+
+    def snapshot(self, include_random=True):
+        """
+        Return the mutable state of the game for restore, as a flat tuple of
+        plain values and trail copies.  The map is shared and not part of
+        it.  Leave out the random streams for lookahead searches which want
+        every branch to play out differently (and save most of the cost).
+
+        >>> board = PacmanBoard(seed=1)
+        >>> board.load_from_string(maps.SIMPLE_TEST)
+        >>> board.paku.logic = lambda board, location, state: (1, 0)
+        >>> saved = board.snapshot()
+        >>> outcomes = [board.tick() for _ in range(30)]
+        >>> def position():
+        ...     ghost = board.ghosts[0]
+        ...     return board.score, tuple(board.paku.location), tuple(ghost.location)
+        >>> after = position()
+        >>> board.restore(saved)
+        >>> board.score, board.paku.location
+        (0, Location(4, 5))
+        >>> outcomes = [board.tick() for _ in range(30)]
+        >>> position() == after
+        True
+        """
+        characters = []
+        memo = {}
+        for c in [self.paku] + self.ghosts:
+            location = c.location
+            previous = c.previous
+            characters.append(
+                (
+                    location.x,
+                    location.y,
+                    previous.x,
+                    previous.y,
+                    _copy_state(c.state, memo) if c.state else None,
+                    _copy_trail(c.breadcrumbs, memo),
+                )
+            )
+        return (
+            tuple(characters),
+            self.consumables.snapshot(),
+            self.ticks,
+            self.score,
+            self.retries,
+            self.empowered,
+            self.empowered_remaining,
+            self.random.getstate() if include_random else None,
+            self.paku_random.getstate() if include_random else None,
+        )
 
+    def restore(self, snapshot):
+        """
+        Put the game back as it was when `snapshot` was taken.  A snapshot
+        may be restored any number of times.
+
+        A chasing ghost keeps its trail in its state as well as following
+        it; restored mid-chase the game goes on as if never interrupted.
+
+        >>> from pmlib import paku_ootb
+        >>> board = PacmanBoard(seed=1)
+        >>> board.load_from_string(maps.LEVEL1)
+        >>> board.paku.logic = paku_ootb.wander_logic
+        >>> for ghost in board.ghosts:
+        ...     ghost.logic = ghost_ootb.chase_logic
+        >>> outcomes = [board.tick() for _ in range(200)]
+        >>> saved = board.snapshot()
+        >>> def play_on():
+        ...     outcomes = [board.tick() for _ in range(300)]
+        ...     ghosts = [tuple(ghost.location) for ghost in board.ghosts]
+        ...     return outcomes, board.score, ghosts
+        >>> uninterrupted = play_on()
+        >>> board.restore(saved)
+        >>> play_on() == uninterrupted
+        True
+        """
+        (
+            characters,
+            consumables,
+            self.ticks,
+            self.score,
+            self.retries,
+            self.empowered,
+            self.empowered_remaining,
+            random_state,
+            paku_random_state,
+        ) = snapshot
+
+        memo = {}
+        for c, (x, y, px, py, state, breadcrumbs) in zip(
+            [self.paku] + self.ghosts, characters
+        ):
+            c.location.place(x, y)
+            c.previous.place(px, py)
+            c.state = {} if state is None else _copy_state(state, memo)
+            c.breadcrumbs = _copy_trail(breadcrumbs, memo)
+        self.consumables.restore(consumables)
+        if random_state is not None:
+            self.random.setstate(random_state)
+            self.paku_random.setstate(paku_random_state)
+
+    def interpolated_location(self, character):
+        """
+        Return the location of `character` blended between the last two
+        iterations by `render_alpha`.  Jumps of more than a cell (tunnels or
+        rehoming) are not blended.
+        """
+        current = character.location
+        previous = character.previous
+        alpha = self.render_alpha
+
+        if (current - previous).manhattan() > 1:
+            return maps.Location(current.x, current.y)
+        return maps.Location(
+            previous.x + (current.x - previous.x) * alpha,
+            previous.y + (current.y - previous.y) * alpha,
+        )
 
-def play(board, render, music):
-    render(board)
+    def tick(self):
+        """
+        Advance the game one iteration and return the outcome of it:  one of
+        PLAYING, CLEARED, CAUGHT (paku lost a life) or LOST.
+        """
+        self.consumables.events.clear()
+        self.ticks += 1
+
+        paku = self.paku
+        paku.previous.place(paku.location.x, paku.location.y)
+        for ghost in self.ghosts:
+            ghost.previous.place(ghost.location.x, ghost.location.y)
+
+        self.play_paku()
+        for ghost in self.ghosts:
+            self.play_ghost(ghost)
+
+        if self.is_cleared():
+            return CLEARED
+
+        met = self.collided_ghosts()
+        if met and self.empowered:
+            for ghost in met:
+                self.rehome_ghost(ghost)
+                self.score += self.GHOST_POINTS
+        elif met:
+            if self.retries > 0:
+                self.reset_characters()
+                self.retries -= 1
+                return CAUGHT
+            else:
+                return LOST
 
-    while True:
-        board.play_paku()
-        for ghost in board.ghosts:
-            board.play_ghost(ghost)
+        return PLAYING
 
-        if board.is_cleared():
+
+def play(board, render, music, scheduler=None, profiler=None):
+    """
+    Play the game in real time.  Iterations run at a fixed cadence of
+    LOOP_SLEEP_SECONDS (catching up or skipping under load) while renders
+    happen every RENDER_SECONDS with `board.render_alpha` set for
+    interpolation.
+
+    Pass a `pmlib.profiling.TickProfiler` as `profiler` to time the phases
+    of every iteration and each render.
+    """
+    if scheduler is None:
+        scheduler = FixedStepScheduler(board.LOOP_SLEEP_SECONDS, board.RENDER_SECONDS)
+
+    if profiler is not None:
+        profiler.attach(board)
+        render = profiler.timed("render", render)
+
+    def step():
+        outcome = board.tick()
+
+        if outcome == CLEARED:
+            board.render_alpha = 1.0
             render(board)
             music.happy()
             return True
+        elif outcome == CAUGHT:
+            music.sad()
+        elif outcome == LOST:
+            board.render_alpha = 1.0
+            render(board)
+            music.devastated()
+            return False
 
-        if board.empowered:
-            for ghost in board.ghosts:
-                if board.is_close(board.paku.location, ghost.location):
-                    board.rehome_ghost(ghost)
+        return None
 
+    def frame(alpha):
+        board.render_alpha = alpha
         render(board)
 
-        if not board.empowered and board.is_collided():
-            if board.retries > 0:
-                music.sad()
-                board.reset_characters()
-                board.retries -= 1
-            else:
-                music.devastated()
-                return False
+    render(board)
 
-        # So the assumption is that the rest of this loop takes 0 time :)
-        time.sleep(board.LOOP_SLEEP_SECONDS)
+    try:
+        return scheduler.run(step, frame)
+    finally:
+        if profiler is not None:
+            profiler.detach()
@@ -0,0 +1,240 @@
+import array
+import collections
+from .rays import DIRECTIONS
+
+# Shortest path distances over the open cells of a PacmanMap.  A distance
+# field holds the number of steps from every open cell to one target cell and
+# is computed by a breadth first search out from the target.  Any path to the
+# target is recovered by stepping downhill through the field, so once a field
+# exists next-step and bread-crumb queries cost only the length of the path.
+#
+# Fields are indexed by a cell's place among the open cells (`slots`), not by
+# its map index, so all the fields of a map take memory in the square of its
+# open cells rather than open cells times the whole map area.
+
+UNREACHABLE = 0xFFFFFFFF
+
+
+class DistanceFields:
+    """
+    Distance fields for one set of blocking cells (ghosts pass gates, paku
+    does not).  Small maps compute every field up front; larger maps compute
+    fields on demand and keep the most recently used `cache_size` of them.
+
+    >>> from pmlib.maps import PacmanMap, SIMPLE_TEST, Location
+    >>> simple = PacmanMap.from_str(SIMPLE_TEST)
+    >>> fields = simple.distance_fields(as_ghost=False)
+    >>> fields.distance((4, 5), (4, 1))
+    10
+    >>> fields.distance((0, 1), (8, 1))
+    1
+    >>> fields.next_direction((4, 5), (1, 1))
+    (-1, 0)
+    >>> fields.trail((6, 5), (8, 1))
+    [Location(7, 5), Location(7, 4), Location(7, 3), Location(7, 2), Location(7, 1), Location(8, 1)]
+    >>> fields.distance((4, 5), (4, 3))  # the ghost box is closed to paku
+    >>> simple.distance_fields(as_ghost=True).distance((4, 5), (4, 3))
+    2
+    """
+
+    # open cell count at or below which all fields are computed when built
+    ALL_PAIRS_LIMIT = 1024
+    CACHE_SIZE = 256
+
+    def __init__(self, pmmap, as_ghost, all_pairs_limit=None, cache_size=None):
+        self.width = pmmap.width
+        self.height = pmmap.height
+
+        if all_pairs_limit is None:
+            all_pairs_limit = self.ALL_PAIRS_LIMIT
+        self.cache_size = self.CACHE_SIZE if cache_size is None else cache_size
+
+        self.blocked = pmmap.blocked_mask(as_ghost)
+
+        # the open cells in map order and slots[cell] -> the index of a cell
+        # in the fields (UNREACHABLE for blocked cells)
+        width, height = self.width, self.height
+        self.cells = array.array(
+            "I", [index for index, blocked in enumerate(self.blocked) if not blocked]
+        )
+        self.slots = array.array("I", [UNREACHABLE]) * (width * height)
+        for slot, index in enumerate(self.cells):
+            self.slots[index] = slot
+
+        # neighbours[cell] -> [(direction, cell index), ...] for open cells
+        self.neighbours = {}
+        for index, blocked in enumerate(self.blocked):
+            if blocked:
+                continue
+            x, y = index % width, index // width
+            adjacent = []
+            for d in DIRECTIONS:
+                other = ((y + d[1]) % height) * width + (x + d[0]) % width
+                if not self.blocked[other]:
+                    adjacent.append((d, other))
+            self.neighbours[index] = adjacent
+
+        # the slots of the neighbours of each slot
+        slots = self.slots
+        self._adjacent = [
+            [slots[other] for _, other in self.neighbours[index]]
+            for index in self.cells
+        ]
+
+        self._fields = collections.OrderedDict()
+
+        if len(self.neighbours) <= all_pairs_limit:
+            self.cache_size = max(self.cache_size, len(self.neighbours))
+            for index in self.neighbours:
+                self._fields[index] = self._search(index)
+
+    def _index(self, loc):
+        return (loc[1] % self.height) * self.width + loc[0] % self.width
+
+    def _search(self, target):
+        field = array.array("I", [UNREACHABLE]) * len(self.cells)
+        target = self.slots[target]
+        field[target] = 0
+
+        frontier = [target]
+        steps = 0
+        adjacent = self._adjacent
+        while frontier:
+            steps += 1
+            following = []
+            for slot in frontier:
+                for other in adjacent[slot]:
+                    if field[other] == UNREACHABLE:
+                        field[other] = steps
+                        following.append(other)
+            frontier = following
+
+        return field
+
+    def field(self, target):
+        """
+        Return the distance field toward the cell `target`, indexed by the
+        slots of the open cells.
+
+        >>> from pmlib.maps import PacmanMap, SIMPLE_TEST
+        >>> fields = PacmanMap.from_str(SIMPLE_TEST).distance_fields(False)
+        >>> field = fields.field((4, 1))
+        >>> len(field) == len(fields.cells), field[fields.slots[5 * 9 + 4]]
+        (True, 10)
+        """
+        index = self._index(target)
+        if index not in self.neighbours:
+            raise ValueError(f"target {target} is not an open cell")
+
+        fields = self._fields
+        if index in fields:
+            fields.move_to_end(index)
+            return fields[index]
+
+        field = self._search(index)
+        fields[index] = field
+        if len(fields) > self.cache_size:
+            fields.popitem(last=False)
+        return field
+
+    def distance(self, source, target):
+        """
+        Return the number of steps from `source` to `target` or None if no
+        path exists.
+        """
+        field = self.field(target)
+        slot = self.slots[self._index(source)]
+        result = UNREACHABLE if slot == UNREACHABLE else field[slot]
+        return None if result == UNREACHABLE else result
+
+    def next_direction(self, source, target):
+        """
+        Return the direction of the first step of a shortest path from
+        `source` to `target`.  None is returned on arrival or when no path
+        exists.
+        """
+        field = self.field(target)
+        index = self._index(source)
+        if index not in self.neighbours:
+            return None
+        here = field[self.slots[index]]
+        if here == 0 or here == UNREACHABLE:
+            return None
+
+        slots = self.slots
+        for direction, other in self.neighbours[index]:
+            if field[slots[other]] == here - 1:
+                return direction
+        return None
+
+    def trail(self, source, target):
+        """
+        Return the cells of a shortest path from `source` (excluded) to
+        `target` (included) as a bread-crumb trail of wrapped Locations.  An
+        empty list is returned on arrival or when no path exists.
+        """
+        from .maps import Location
+
+        field = self.field(target)
+        slot = self.slots[self._index(source)]
+        if slot == UNREACHABLE or field[slot] == UNREACHABLE:
+            return []
+
+        width = self.width
+        cells = self.cells
+        adjacent = self._adjacent
+        here = field[slot]
+        trail = []
+        while here > 0:
+            for other in adjacent[slot]:
+                if field[other] == here - 1:
+                    slot = other
+                    break
+            here -= 1
+            index = cells[slot]
+            trail.append(Location(index % width, index // width))
+        return trail
+
+    def local_trail(self, source, target, limit):
+        """
+        Like trail but only searching up to `limit` steps around `source`,
+        which is cheap when the cells are known to be close.  Returns None if
+        `target` is further than that.
+
+        >>> from pmlib.maps import PacmanMap, SIMPLE_TEST
+        >>> fields = PacmanMap.from_str(SIMPLE_TEST).distance_fields(False)
+        >>> fields.local_trail((1, 5), (3, 5), 2)
+        [Location(2, 5), Location(3, 5)]
+        >>> fields.local_trail((1, 5), (4, 5), 2) is None
+        True
+        """
+        from .maps import Location
+
+        start = self._index(source)
+        goal = self._index(target)
+        if start not in self.neighbours or goal not in self.neighbours:
+            return None
+
+        parents = {start: None}
+        frontier = [start]
+        for _ in range(limit):
+            if goal in parents:
+                break
+            following = []
+            for index in frontier:
+                for _, other in self.neighbours[index]:
+                    if other not in parents:
+                        parents[other] = index
+                        following.append(other)
+            frontier = following
+        if goal not in parents:
+            return None
+
+        width = self.width
+        trail = []
+        index = goal
+        while index != start:
+            trail.append(Location(index % width, index // width))
+            index = parents[index]
+        trail.reverse()
+        return trail
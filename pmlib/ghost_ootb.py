@@ -1,4 +1,4 @@
-import random
+from .trails import Trail
 
 # This is an out-of-the-box ghost AI implementation.  In theory this is
 # pluggable from a front-end, but that isn't necessary.  Note that the ghost is
@@ -8,20 +8,56 @@ import random
 def simple_logic(board, location, state):
     directions = board.allowable_directions(location, True)
 
+    # the limit is the wall cell so the room to move is one less
+    def room(limit):
+        return (location - limit).manhattan() - 1
+
     # if going in a direction with more space, keep going
-    if state["current_direction"]:
+    if state.get("current_direction"):
         limit = directions[state["current_direction"]]
-        distance = (location - limit).manhattan()
-        if distance > board.WALL_BUMPER:
+        if room(limit) > board.WALL_BUMPER:
             return state["current_direction"]
 
     choices = []
     for kdir, limit in directions.items():
-        distance = (location - limit).manhattan()
-
-        if distance > board.WALL_BUMPER:
+        if room(limit) > board.WALL_BUMPER:
             choices.append(kdir)
 
-    newdir = random.choose(choices)
+    if not choices:
+        return None
+
+    newdir = board.random.choice(choices)
     state["current_direction"] = newdir
     return newdir
+
+
+# how far paku may move from a chasing ghost's planned target before the
+# trail is planned afresh rather than repaired
+CHASE_TOLERANCE = 4
+
+
+def chase_logic(board, location, state):
+    """
+    Follow a bread-crumb trail to paku.  The board only asks again at
+    junctions, when the trail is repaired toward where paku is now.
+
+    >>> import pmlib
+    >>> board = pmlib.PacmanBoard(seed=2)
+    >>> board.load_from_string(pmlib.level1)
+    >>> board.paku.logic = lambda board, location, state: (1, 0)
+    >>> ghost = board.ghosts[0]
+    >>> ghost.logic = chase_logic
+    >>> outcomes = [board.tick() for _ in range(120)]
+    >>> ghost.breadcrumbs.replan, ghost.breadcrumbs.target
+    (True, Location(15, 9))
+    >>> board.paku.location
+    Location(15.0, 9)
+    """
+    trail = state.get("trail")
+    if trail is None:
+        trail = state["trail"] = Trail(replan=True)
+
+    fields = board.map.distance_fields(as_ghost=True)
+    target = board.paku.location.rounded()
+    trail.retarget(fields, location.rounded(), target, CHASE_TOLERANCE)
+    return trail
@@ -0,0 +1,269 @@
+import weakref
+from .maps import PacmanMap
+from .trails import Trail
+
+# Ghost logic with the four personalities of the arcade ghosts.  Each ghost
+# heads for its own target cell by the shortest path:
+#
+#   Chaser (Blinky)    paku's cell
+#   Ambusher (Pinky)   AMBUSH_STEPS cells ahead of paku
+#   Fickle (Inky)      either of those, changing its mind at every junction
+#   Stupid (Clyde)     paku's cell when far away, its corner when close
+#
+# The targets and the distance fields toward them are worked out once per
+# iteration in a FlowPlan shared by all the ghosts of a board, so a ghost's
+# decision is a look at its open neighbours in a field and more ghosts cost
+# no more searching.  Fields are cached by the map's DistanceFields so a
+# search happens only when paku reaches a new cell.
+#
+# The ghosts scatter to their corners and chase in turns (MODE_SCHEDULE) and
+# while paku is empowered they are frightened and flee at random.  Logic
+# returns the bread-crumb trail to the next junction so the board only asks
+# again where there is a choice to make.  Ghosts never turn back except at a
+# dead end.
+
+CHASER = "chaser"
+AMBUSHER = "ambusher"
+FICKLE = "fickle"
+STUPID = "stupid"
+
+# in the order of PacmanBoard.ghosts
+PERSONALITIES = (FICKLE, CHASER, AMBUSHER, STUPID)
+
+SCATTER = "scatter"
+CHASE = "chase"
+FRIGHTENED = "frightened"
+
+# iterations of scatter and chase in turn from the start of the game (7, 20,
+# 7, 20, 5, 20 & 5 seconds); the ghosts chase for good after that
+MODE_SCHEDULE = (875, 2500, 875, 2500, 625, 2500, 625)
+
+AMBUSH_STEPS = 4
+# the stupid ghost turns for its corner when this close to paku
+STUPID_RADIUS = 8
+
+# scatter corners as fractions of the map width & height
+CORNERS = {CHASER: (1, 0), AMBUSHER: (0, 0), FICKLE: (1, 1), STUPID: (0, 1)}
+
+
+def mode_at(ticks):
+    """
+    Return the mode (SCATTER or CHASE) of the schedule after `ticks`
+    iterations.
+
+    >>> mode_at(0), mode_at(875), mode_at(3375), mode_at(10**6)
+    ('scatter', 'chase', 'scatter', 'chase')
+    """
+    for index, length in enumerate(MODE_SCHEDULE):
+        if ticks < length:
+            return SCATTER if index % 2 == 0 else CHASE
+        ticks -= length
+    return CHASE
+
+
+class FlowPlan:
+    """
+    What the ghosts of one board know in common during an iteration:  the
+    mode, paku's cell and projected cell and the distance fields toward them.
+
+    >>> import pmlib
+    >>> board = pmlib.PacmanBoard(seed=1)
+    >>> board.load_from_string(pmlib.level1)
+    >>> plan = flow_plan(board)
+    >>> plan is flow_plan(board), plan.mode
+    (True, 'scatter')
+    >>> plan.location(plan.paku), plan.location(plan.corners[CHASER])
+    (Location(12, 9), Location(24, 2))
+    """
+
+    def __init__(self, pmmap):
+        self.map = pmmap
+        self.fields = pmmap.distance_fields(as_ghost=True)
+        self.graph = pmmap.corridor_graph(as_ghost=True)
+        # fields are indexed by these slots of the cells
+        self.slots = self.fields.slots
+
+        self.corners = {name: self._corner(*CORNERS[name]) for name in CORNERS}
+
+        self._key = None
+        self.mode = None
+        # cell indexes and the fields toward them
+        self.paku = self.ahead = None
+        self.chase = self.ambush = None
+
+    def location(self, index):
+        return self.graph.location(index)
+
+    def _field(self, index):
+        width = self.graph.width
+        return self.fields.field((index % width, index // width))
+
+    def _corner(self, fx, fy):
+        # the open cell outside the ghost boxes nearest the corner
+        width, height = self.map.width, self.map.height
+        closed = self.map.grid.flag_mask(
+            PacmanMap.WALL | PacmanMap.GATE | PacmanMap.GHOST
+        )
+        x0, y0 = fx * (width - 1), fy * (height - 1)
+        sx, sy = 1 - 2 * fx, 1 - 2 * fy
+        for steps in range(width + height):
+            for dx in range(min(steps, width - 1) + 1):
+                dy = steps - dx
+                if dy < height:
+                    index = (y0 + sy * dy) * width + x0 + sx * dx
+                    if not closed[index]:
+                        return index
+        raise ValueError("the map has no open cells")
+
+    def update(self, board):
+        paku = board.paku
+        graph = self.graph
+        cell = graph.index(paku.location.rounded())
+        key = (board.ticks, cell, board.empowered)
+        if key == self._key:
+            return
+        self._key = key
+
+        self.mode = FRIGHTENED if board.empowered else mode_at(board.ticks)
+
+        # paku's heading is the way it moved this iteration (ghosts play
+        # after paku); a jump is a tunnel and goes the other way
+        heading = []
+        for delta in paku.location - paku.previous:
+            sign = (delta > 0) - (delta < 0)
+            heading.append(-sign if abs(delta) > 1 else sign)
+
+        ahead = cell
+        if any(heading):
+            for _ in range(AMBUSH_STEPS):
+                x, y = ahead % graph.width, ahead // graph.width
+                onward = graph.index((x + heading[0], y + heading[1]))
+                if onward not in graph.neighbours[ahead] or graph.gates[onward]:
+                    break
+                ahead = onward
+
+        if cell != self.paku:
+            self.paku = cell
+            self.chase = self._field(cell)
+        if ahead != self.ahead:
+            self.ahead = ahead
+            self.ambush = self._field(ahead)
+
+    def distance(self, field, cell):
+        return field[self.slots[cell]]
+
+    def field(self, personality, cell, board):
+        """
+        Return the distance field a ghost of `personality` at `cell` follows
+        in the present mode.
+        """
+        if self.mode == SCATTER:
+            return self._field(self.corners[personality])
+        if personality == AMBUSHER:
+            return self.ambush
+        if personality == FICKLE:
+            return self.chase if board.random.random() < 0.5 else self.ambush
+        if personality == STUPID and self.distance(self.chase, cell) <= STUPID_RADIUS:
+            return self._field(self.corners[personality])
+        return self.chase
+
+
+# board -> FlowPlan
+_plans = weakref.WeakKeyDictionary()
+
+
+def flow_plan(board):
+    """
+    Return the FlowPlan of `board` brought up to date for this iteration.
+    """
+    plan = _plans.get(board)
+    if plan is None or plan.map is not board.map:
+        plan = _plans[board] = FlowPlan(board.map)
+    plan.update(board)
+    return plan
+
+
+def steer(board, location, state, personality):
+    """
+    Return the trail to the next junction for a ghost of `personality`.
+    """
+    plan = flow_plan(board)
+    graph = plan.graph
+    cell = graph.index(location.rounded())
+    choices = graph.neighbours.get(cell)
+    if not choices:
+        return None
+
+    # no turning back and no going home through a gate unless cornered
+    if state.get("at") == cell:
+        choices = [n for n in choices if n != state["came"]] or choices
+    choices = [n for n in choices if not graph.gates[n]] or choices
+
+    if plan.mode == FRIGHTENED:
+        # flee from paku if there is a way to
+        chase, slots = plan.chase, plan.slots
+        away = [n for n in choices if chase[slots[n]] > chase[slots[cell]]]
+        step = board.random.choice(away or choices)
+    else:
+        field, slots = plan.field(personality, cell, board), plan.slots
+        step = min(choices, key=lambda n: field[slots[n]])
+
+    cells = graph.edge(cell, step).cells
+    state["at"] = cells[-1]
+    state["came"] = cells[-2] if len(cells) > 1 else cell
+    return Trail([graph.location(c) for c in cells])
+
+
+def chaser_logic(board, location, state):
+    return steer(board, location, state, CHASER)
+
+
+def ambusher_logic(board, location, state):
+    return steer(board, location, state, AMBUSHER)
+
+
+def fickle_logic(board, location, state):
+    return steer(board, location, state, FICKLE)
+
+
+def stupid_logic(board, location, state):
+    return steer(board, location, state, STUPID)
+
+
+def personality_logic(board, location, state):
+    """
+    Give each ghost the personality of its place in the board's ghosts
+    (see PERSONALITIES), for use where one logic is set on every ghost.
+
+    >>> import pmlib
+    >>> from pmlib import headless, paku_ootb
+    >>> board = pmlib.PacmanBoard(seed=5)
+    >>> board.load_from_string(pmlib.level1)
+    >>> board.paku.logic = paku_ootb.wander_logic
+    >>> for ghost in board.ghosts:
+    ...     ghost.logic = personality_logic
+    >>> result = headless.simulate(board, max_ticks=3000)
+    >>> [ghost.state["personality"] for ghost in board.ghosts]
+    ['fickle', 'chaser', 'ambusher', 'stupid']
+    >>> result.lives_lost > 0
+    True
+
+    A ghost the board does not hold (here on a board without ghosts) is
+    given the first personality.
+
+    >>> board.ghosts, state = [], {}
+    >>> trail = personality_logic(board, board.map.ghost_exits()[0], state)
+    >>> state["personality"]
+    'fickle'
+    """
+    personality = state.get("personality")
+    if personality is None:
+        # a state held by none of the board's ghosts gets the first one
+        index = 0
+        for place, ghost in enumerate(board.ghosts):
+            if ghost.state is state:
+                index = place
+                break
+        personality = PERSONALITIES[index % len(PERSONALITIES)]
+        state["personality"] = personality
+    return steer(board, location, state, personality)
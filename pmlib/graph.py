@@ -0,0 +1,233 @@
+from .rays import DIRECTIONS
+
+# A compressed view of the open cells of a PacmanMap.  Most open cells are
+# corridor cells with exactly two open neighbours; the rest (junctions and
+# dead ends) are the nodes of the graph.  An edge is the run of cells a
+# character passes through from one cell until it next has a choice to make.
+# Cells are identified by their row-major index in the map grid.
+
+
+class CorridorEdge:
+    """
+    The run of cells entered from `prior` by stepping into `cells[0]`.  The
+    run ends at `cells[-1]` which is either a dead end (no branches) or a cell
+    with a choice of `branches`, each a (prior, first) pair starting the next
+    edge.  The weight is the number of steps along the edge; tunnel edges
+    wrap around the map edge and gate edges pass through a ghost box gate.
+    """
+
+    __slots__ = ("prior", "cells", "branches", "tunnel", "gate")
+
+    def __init__(self, prior, cells, branches, tunnel=False, gate=False):
+        self.prior = prior
+        self.cells = cells
+        self.branches = branches
+        self.tunnel = tunnel
+        self.gate = gate
+
+    def __repr__(self):
+        return f"CorridorEdge({self.prior}, {self.cells}, {self.branches})"
+
+    @property
+    def end(self):
+        return self.cells[-1]
+
+    @property
+    def weight(self):
+        return len(self.cells)
+
+
+class CorridorGraph:
+    """
+    >>> from pmlib.maps import PacmanMap, SIMPLE_TEST, Location
+    >>> simple = PacmanMap.from_str(SIMPLE_TEST)
+    >>> graph = simple.corridor_graph(as_ghost=False)
+    >>> [divmod(node, simple.width)[::-1] for node in graph.nodes]
+    [(1, 1), (7, 1), (3, 3), (5, 3)]
+    >>> edge = graph.edge(simple.width + 1, simple.width + 2)
+    >>> edge.weight, len(edge.branches), edge.tunnel
+    (6, 2, False)
+    >>> [e.weight for e in graph.node_edges[simple.width + 1]]
+    [14, 6, 3]
+    >>> graph.node_edges[simple.width + 1][2].tunnel
+    True
+    >>> edge, offset = graph.locate(Location(2.25, 5))
+    >>> graph.location(edge.prior), graph.location(edge.end), offset
+    (Location(1, 1), Location(7, 1), 5.25)
+
+    Ghosts pass through the gate into the ghost box.
+
+    >>> graph = simple.corridor_graph(as_ghost=True)
+    >>> [(e.weight, e.gate) for e in graph.node_edges[3 * simple.width + 4]]
+    [(2, True), (1, False), (1, False)]
+    """
+
+    def __init__(self, width, height, blocked, gates=None):
+        self.width = width
+        self.height = height
+        self.blocked = blocked
+        self.gates = gates
+
+        # open neighbours of each open cell in DIRECTIONS order
+        self.neighbours = {}
+        for index, cell in enumerate(blocked):
+            if not cell:
+                self.neighbours[index] = self._open_adjacent(index)
+
+        self.nodes = [i for i, adj in self.neighbours.items() if len(adj) != 2]
+
+        # (prior, first) -> CorridorEdge; every edge leaving a node is
+        # compiled here and other starting steps are added as they are asked
+        # for.
+        self.edges = {}
+
+        # node -> edges leaving it in DIRECTIONS order
+        self.node_edges = {}
+
+        # cell -> (edge, steps along edge) for each open cell
+        self.cell_edges = {}
+
+        for node in self.nodes:
+            self._compile_node(node)
+
+        # A closed loop of corridor cells has no node; promote one of its
+        # cells to be a node.
+        for index in self.neighbours:
+            if index not in self.cell_edges:
+                self.nodes.append(index)
+                self._compile_node(index)
+
+    def _compile_node(self, node):
+        edges = [self.edge(node, first) for first in self.neighbours[node]]
+        self.node_edges[node] = edges
+        self.cell_edges.setdefault(node, (edges[0] if edges else None, 0))
+
+        for edge in edges:
+            for steps, cell in enumerate(edge.cells[:-1], 1):
+                self.cell_edges.setdefault(cell, (edge, steps))
+
+    def _open_adjacent(self, index):
+        width, height = self.width, self.height
+        x, y = index % width, index // width
+        results = []
+        for dx, dy in DIRECTIONS:
+            other = ((y + dy) % height) * width + (x + dx) % width
+            if not self.blocked[other]:
+                results.append(other)
+        return results
+
+    def index(self, loc):
+        return (loc[1] % self.height) * self.width + loc[0] % self.width
+
+    def location(self, index):
+        from .maps import Location
+
+        return Location(index % self.width, index // self.width)
+
+    def _step(self, source, target):
+        # unit step between adjacent cells accounting for wrap-around
+        width, height = self.width, self.height
+        dx = (target % width - source % width + 1) % width - 1
+        dy = (target // width - source // width + 1) % height - 1
+        return dx, dy
+
+    def locate(self, loc):
+        """
+        Return (edge, offset) placing the floating point Location `loc` on the
+        graph, where offset is the distance along the edge from its prior
+        node.  Locations on a node are placed at the start of an edge leaving
+        it.
+        """
+        cell = loc.rounded()
+        edge, steps = self.cell_edges[self.index(cell)]
+        if edge is None or steps == 0:
+            return edge, 0
+
+        previous = edge.prior if steps == 1 else edge.cells[steps - 2]
+        dx, dy = self._step(previous, edge.cells[steps - 1])
+        along = (loc.x - cell.x) * dx + (loc.y - cell.y) * dy
+        return edge, min(max(steps + along, 0), edge.weight)
+
+    def is_junction(self, index):
+        return len(self.neighbours.get(index, ())) > 2
+
+    def edge(self, prior, first):
+        """
+        Return the CorridorEdge entered by stepping from `prior` into `first`.
+        `prior` may be None when there is no direction to exclude.
+        """
+        key = (prior, first)
+        edge = self.edges.get(key)
+        if edge is not None:
+            return edge
+
+        neighbours = self.neighbours
+        cells = [first]
+        previous, current = prior, first
+
+        # A closed loop of corridor cells has no junction to stop at; break
+        # the walk after visiting every open cell once.
+        for _ in range(len(neighbours)):
+            adjacent = neighbours.get(current)
+            if adjacent is None:
+                adjacent = self._open_adjacent(current)
+            onward = [n for n in adjacent if n != previous]
+            if len(onward) != 1:
+                break
+            previous, current = current, onward[0]
+            cells.append(current)
+        else:
+            onward = [n for n in neighbours[current] if n != previous]
+
+        tunnel = False
+        if prior is not None:
+            for source, target in zip([prior] + cells, cells):
+                if abs(source % self.width - target % self.width) > 1:
+                    tunnel = True
+                elif abs(source // self.width - target // self.width) > 1:
+                    tunnel = True
+        gate = self.gates is not None and any(self.gates[c] for c in cells)
+
+        edge = CorridorEdge(
+            prior,
+            tuple(cells),
+            tuple((current, n) for n in onward),
+            tunnel=tunnel,
+            gate=gate,
+        )
+        self.edges[key] = edge
+        return edge
+
+    def iter_paths(self, prior, first, maxlen):
+        """
+        Iterate non-backtracking paths of cell indices as tuples.  Paths end
+        at a dead end or when they reach `maxlen` cells.  Paths under
+        construction share their common prefixes as a linked chain of edge
+        runs which is only flattened when a path is complete.
+        """
+
+        def flatten(chain):
+            runs = []
+            while chain is not None:
+                runs.append(chain[0])
+                chain = chain[1]
+            return tuple(cell for run in reversed(runs) for cell in run)
+
+        stack = [(None, 0, prior, first)]
+        while stack:
+            chain, length, prior, first = stack.pop()
+            edge = self.edge(prior, first)
+
+            room = maxlen - length
+            if len(edge.cells) >= room:
+                yield flatten((edge.cells[: max(room, 1)], chain))
+                continue
+
+            chain = (edge.cells, chain)
+            if not edge.branches:
+                yield flatten(chain)
+                continue
+
+            length += len(edge.cells)
+            for branch in reversed(edge.branches):
+                stack.append((chain, length, *branch))
@@ -0,0 +1,115 @@
+import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is an optional accelerator
+    numpy = None
+
+# Compact storage for the cells of a PacmanMap.  The cell flags fit in 16 bits
+# so the grid is an `array('H')` in row-major order; when numpy is installed
+# the bulk queries run against a zero-copy view of that same buffer.  A grid
+# may also wrap a read-only buffer such as a memory-mapped compiled map.
+
+
+class CellGrid:
+    """
+    Row-major 2 dim'l array of cell flags addressed by (x, y).
+
+    >>> grid = CellGrid(3, 2, [0, 1, 2, 3, 1, 0])
+    >>> grid.get(2, 0), grid.get(0, 1)
+    (2, 3)
+    >>> grid.locations(1)
+    [(0, 1), (1, 0), (1, 1)]
+    >>> grid.count(1), grid.count(2), grid.count(3)
+    (3, 2, 4)
+    >>> list(grid.flag_mask(2))
+    [0, 0, 1, 1, 0, 0]
+    """
+
+    __slots__ = ("width", "height", "cells")
+
+    def __init__(self, width, height, cells=None):
+        self.width = width
+        self.height = height
+
+        if cells is None:
+            self.cells = array.array("H", bytes(2 * width * height))
+        else:
+            self.cells = array.array("H", cells)
+
+        if len(self.cells) != width * height:
+            raise ValueError(f"expected {width * height} cells, got {len(self.cells)}")
+
+    @classmethod
+    def from_buffer(cls, width, height, cells):
+        """
+        Return a grid using `cells` (anything with the buffer interface and
+        the layout of an array('H')) without copying it.
+
+        >>> grid = CellGrid.from_buffer(2, 1, bytes([1, 0, 2, 0]))
+        >>> grid.get(1, 0), grid.locations(2)
+        (2, [(1, 0)])
+        """
+        self = cls.__new__(cls)
+        self.width = width
+        self.height = height
+        self.cells = memoryview(cells).cast("B").cast("H")
+        if len(self.cells) != width * height:
+            raise ValueError(f"expected {width * height} cells, got {len(self.cells)}")
+        return self
+
+    def __len__(self):
+        return len(self.cells)
+
+    def get(self, x, y):
+        return self.cells[y * self.width + x]
+
+    def set(self, x, y, value):
+        self.cells[y * self.width + x] = value
+
+    def view(self):
+        """
+        Return a (height, width) numpy array sharing memory with the grid.
+        """
+        if numpy is None:
+            raise RuntimeError("numpy is required for array views of the grid")
+        return numpy.frombuffer(self.cells, dtype=numpy.uint16).reshape(
+            self.height, self.width
+        )
+
+    def flag_array(self, flags):
+        """
+        Return a (height, width) numpy boolean array of cells with any of
+        `flags` set.
+        """
+        return (self.view() & flags) != 0
+
+    def flag_mask(self, flags):
+        """
+        Return a flat row-major bytearray with 1 in cells with any of `flags`
+        set and 0 elsewhere.
+        """
+        if numpy is not None:
+            return bytearray(self.flag_array(flags).tobytes())
+        return bytearray(1 if cell & flags else 0 for cell in self.cells)
+
+    def count(self, flags):
+        if numpy is not None:
+            return int(numpy.count_nonzero(self.view() & flags))
+        return sum(1 for cell in self.cells if cell & flags)
+
+    def locations(self, flags):
+        """
+        Return (x, y) for each cell with any of `flags` set, ordered by column
+        and then by row.
+        """
+        if numpy is not None:
+            xs, ys = numpy.nonzero(self.view().T & flags)
+            return list(zip(xs.tolist(), ys.tolist()))
+
+        width = self.width
+        results = []
+        for x in range(width):
+            column = self.cells[x::width]
+            results.extend((x, y) for y, cell in enumerate(column) if cell & flags)
+        return results
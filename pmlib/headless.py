@@ -0,0 +1,59 @@
+import collections
+from . import core
+
+# Headless games run the same rules as `pmlib.core.play` but with no
+# rendering, no music and no sleeping between iterations.  They are used to
+# evaluate logic functions as quickly as the rules can be computed.
+
+TIMEOUT = "timeout"
+
+GameResult = collections.namedtuple(
+    "GameResult",
+    ["outcome", "ticks", "score", "cookies_eaten", "pills_eaten", "lives_lost"],
+)
+
+
+def simulate(board, max_ticks=100000):
+    """
+    Play the loaded `board` until it is cleared, lost or `max_ticks`
+    iterations have passed and return a GameResult.  The outcome is one of
+    `core.CLEARED`, `core.LOST` or TIMEOUT.
+
+    >>> import pmlib
+    >>> board = pmlib.PacmanBoard()
+    >>> board.load_from_string(pmlib.level1)
+    >>> board.paku.logic = lambda board, location, state: (1, 0)
+    >>> simulate(board, max_ticks=10)
+    GameResult(outcome='timeout', ticks=10, score=10, cookies_eaten=1, pills_eaten=0, lives_lost=0)
+    """
+    consumables = board.consumables
+    cookies = consumables.cookie_count
+    pills = consumables.pill_count
+
+    tick = board.tick
+    ticks = 0
+    lives_lost = 0
+    outcome = TIMEOUT
+
+    while ticks < max_ticks:
+        ticks += 1
+        result = tick()
+
+        if result == core.PLAYING:
+            continue
+        elif result == core.CAUGHT:
+            lives_lost += 1
+        else:
+            if result == core.LOST:
+                lives_lost += 1
+            outcome = result
+            break
+
+    return GameResult(
+        outcome,
+        ticks,
+        board.score,
+        cookies - consumables.cookie_count,
+        pills - consumables.pill_count,
+        lives_lost,
+    )
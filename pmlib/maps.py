@@ -1,4 +1,11 @@
-import itertools
+import array
+import collections
+import math
+import sys
+from .grid import CellGrid
+from .rays import WallRays
+from .distance import DistanceFields
+from .graph import CorridorGraph
 
 # Map strings -- default dimensions 15 x 25
 
@@ -35,7 +42,22 @@ class MapParseError(Exception):
     pass
 
 
+_floor = math.floor
+
+# PacmanMap.wall_tiles of a cell with no wall
+NO_TILE = 0xFF
+
+
+# Location and Vector are small value types created in bulk by the movement
+# code every tick.  They are slotted, compare and hash equal to the matching
+# 2-tuple so they can key dicts & sets alongside plain tuples, and offer
+# in-place variants for the movement loop.  Don't update a Location in-place
+# while it is a dictionary key.
+
+
 class Vector:
+    __slots__ = ("dx", "dy")
+
     def __init__(self, dx=None, dy=None):
         """
         >>> vec = Vector(1, 2)
@@ -43,6 +65,8 @@ class Vector:
         True
         >>> vec.dx
         1
+        >>> vec == (1, 2), {(1, 2): "found"}[vec]
+        (True, 'found')
         """
         self.dx = dx
         self.dy = dy
@@ -55,8 +79,23 @@ class Vector:
         return 2
 
     def __getitem__(self, index):
-        assert type(index) is int and 0 <= index <= 1
-        return self.dx if index == 0 else self.dy
+        return (self.dx, self.dy)[index]
+
+    def __iter__(self):
+        yield self.dx
+        yield self.dy
+
+    def __eq__(self, other):
+        try:
+            return len(other) == 2 and self.dx == other[0] and self.dy == other[1]
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash((self.dx, self.dy))
+
+    def scaled(self, factor) -> "Vector":
+        return Vector(self.dx * factor, self.dy * factor)
 
     def manhattan(self):
         """
@@ -68,20 +107,46 @@ class Vector:
         >>> vec.manhattan()
         4.5
         >>> vec = Vector(1, 3)
-        >>> vec.manhattan(), type(vec.manhattan())
-        (4, int)
+        >>> vec.manhattan(), type(vec.manhattan()) is int
+        (4, True)
         """
 
-        return abs(self.dx) + abs(self.dy)
+        dx = self.dx
+        dy = self.dy
+        return (dx if dx >= 0 else -dx) + (dy if dy >= 0 else -dy)
 
     def is_perpendicular(self, other: "Vector") -> bool:
-        pass  # TODO: implement
+        """
+        >>> Vector(0.3, 0).is_perpendicular((0, 1))
+        True
+        >>> Vector(0.3, 0).is_perpendicular((-1, 0))
+        False
+        """
+        if other.__class__ is Vector:
+            return self.dx * other.dx + self.dy * other.dy == 0
+        return self.dx * other[0] + self.dy * other[1] == 0
 
     def unit(self) -> "Vector":
-        pass  # TODO: implement
+        """
+        Return the unit vector along the dominant axis of this vector.
+
+        >>> Vector(-0.3, 0.1).unit()
+        Vector(-1, 0)
+        >>> Vector(0, 2).unit()
+        Vector(0, 1)
+        """
+        dx = self.dx
+        dy = self.dy
+        if (dx if dx >= 0 else -dx) >= (dy if dy >= 0 else -dy):
+            if dx == 0:
+                return Vector(0, 0)
+            return Vector(1 if dx > 0 else -1, 0)
+        return Vector(0, 1 if dy > 0 else -1)
 
 
 class Location:
+    __slots__ = ("x", "y")
+
     def __init__(self, x=None, y=None):
         """
         >>> loc = Location(1, 2)
@@ -89,6 +154,9 @@ class Location:
         True
         >>> loc.x
         1
+        >>> x, y = loc
+        >>> loc == (1, 2), loc in {Location(1, 2)}
+        (True, True)
         """
         self.x = x
         self.y = y
@@ -101,8 +169,20 @@ class Location:
         return 2
 
     def __getitem__(self, index):
-        assert type(index) is int and 0 <= index <= 1
-        return self.x if index == 0 else self.y
+        return (self.x, self.y)[index]
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __eq__(self, other):
+        try:
+            return len(other) == 2 and self.x == other[0] and self.y == other[1]
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash((self.x, self.y))
 
     def __add__(self, other: Vector) -> "Location":
         """
@@ -112,15 +192,86 @@ class Location:
         Location(6, 8)
         >>> l1 + l2
         Location(4, 6)
+        >>> l1 + Vector(0.5, 0)
+        Location(1.5, 2)
         """
 
+        if other.__class__ is Vector:
+            return Location(self.x + other.dx, self.y + other.dy)
         return Location(self.x + other[0], self.y + other[1])
 
     def __sub__(self, other: "Location") -> Vector:
-        return Location(self.x - other[0], self.y - other[1])
+        """
+        >>> Location(3, 4) - Location(1.5, 4)
+        Vector(1.5, 0)
+        """
+        if other.__class__ is Location:
+            return Vector(self.x - other.x, self.y - other.y)
+        return Vector(self.x - other[0], self.y - other[1])
+
+    def shift(self, dx, dy) -> "Location":
+        """
+        Move this location in-place and return it.
+
+        >>> loc = Location(1, 2)
+        >>> loc.shift(0.25, 0) is loc, loc
+        (True, Location(1.25, 2))
+        """
+        self.x += dx
+        self.y += dy
+        return self
+
+    def place(self, x, y) -> "Location":
+        """
+        Set this location in-place and return it.
+        """
+        self.x = x
+        self.y = y
+        return self
 
     def rounded(self) -> "Location":
-        pass  # TODO: implement
+        """
+        Return the grid cell containing this location; halves round up.
+
+        >>> Location(2.5, 3.49).rounded()
+        Location(3, 3)
+        >>> Location(-0.6, 1).rounded()
+        Location(-1, 1)
+        """
+        x = self.x
+        y = self.y
+        if x.__class__ is not int:
+            x = _floor(x + 0.5)
+        if y.__class__ is not int:
+            y = _floor(y + 0.5)
+        return Location(x, y)
+
+
+def _legend_table(legend, shift):
+    # a bytes.translate table of one byte of the flags of each character
+    return bytes((legend.get(chr(i), 0) >> shift) & 0xFF for i in range(256))
+
+
+def _join_walls(low, width, height, wall):
+    # Add the DIR_MASK bits to the low flag bytes `low`:  each wall cell
+    # joins the walls north, east, south & west of it (bits 1, 2, 4 & 8).
+    # The neighbour masks are the wall mask shifted a row or a column and
+    # are combined as big integers since no byte can carry past 15.
+    walls = low.translate(bytes(1 if i & wall else 0 for i in range(256)))
+    blank = bytes(width)
+    north = blank + walls[:-width]
+    south = walls[width:] + blank
+    east = bytearray(walls[1:] + b"\0")
+    east[width - 1 :: width] = bytes(height)
+    west = bytearray(b"\0" + walls[:-1])
+    west[::width] = bytes(height)
+
+    def value(mask):
+        return int.from_bytes(mask, "little")
+
+    joins = value(north) | value(east) << 1 | value(south) << 2 | value(west) << 3
+    joins &= value(walls) * 15
+    return (value(low) | joins).to_bytes(len(low), "little")
 
 
 class PacmanMap:
@@ -141,7 +292,12 @@ class PacmanMap:
     20
     """
 
+    # DIR_MASK bits of a wall cell are the neighbouring walls it joins
     DIR_MASK = 0x000F
+    JOINS_NORTH = 0x0001
+    JOINS_EAST = 0x0002
+    JOINS_SOUTH = 0x0004
+    JOINS_WEST = 0x0008
     WALL = 0x0010
     GATE = 0x0020
     PILL = 0x0040
@@ -149,10 +305,48 @@ class PacmanMap:
     PAKU = 0x0100
     GHOST = 0x0200
 
+    # legend character -> cell flags
+    LEGEND = {
+        "|": WALL,
+        "-": WALL,
+        "+": WALL,
+        "=": GATE,
+        "o": COOKIE,
+        "*": PILL,
+        "@": PAKU,
+        "x": GHOST,
+    }
+    _LEGEND_LOW = _legend_table(LEGEND, 0)
+    _LEGEND_HIGH = _legend_table(LEGEND, 8)
+
+    # iter_paths keeps the results of this many calls each with no more than
+    # PATH_CACHE_PATHS paths
+    PATH_CACHE_SIZE = 256
+    PATH_CACHE_PATHS = 1024
+
     def __init__(self):
-        # Grid will be a list interpreted as a 2 dim'l array.
+        # Grid is a CellGrid -- compact row-major storage of the cell flags.
         self.grid = None
 
+        # WallRays for paku (walls & gates) and for ghosts (walls only)
+        self.paku_rays = None
+        self.ghost_rays = None
+
+        # DistanceFields & CorridorGraph keyed by as_ghost, built on first use
+        self._distance_fields = {}
+        self._corridor_graphs = {}
+
+        # flags -> [(x, y), ...] from element_locations; a compiled map
+        # provides cell indexes which are turned into locations on first use
+        self._elements = {}
+        self._element_indexes = {}
+
+        # see wall_tiles
+        self._wall_tiles = None
+
+        # (prior, first, maxlen) -> tuple of paths from iter_paths
+        self._path_cache = collections.OrderedDict()
+
         self.width = None
         self.height = None
 
@@ -173,33 +367,58 @@ class PacmanMap:
         self.width = lengths.pop()
         self.height = len(lines)
 
-        def deserialize(ch):
-            if ch in "|-+":
-                return cls.WALL
-            elif ch in "=":
-                return cls.GATE
-            elif ch in "o":
-                return cls.COOKIE
-            elif ch in "*":
-                return cls.PILL
-            elif ch in "@":
-                return cls.PAKU
-            elif ch in "x":
-                return cls.GHOST
-            else:
-                raise MapParseError(f"unknown legend character {ch}")
-
-        self.grid = [deserialize(ch) for line in lines for ch in line]
+        text = "".join(lines)
+        unknown = set(text).difference(cls.LEGEND)
+        if unknown:
+            ch = next(ch for ch in text if ch in unknown)
+            raise MapParseError(f"unknown legend character {ch}")
+
+        # translate the legend bytes to the low & high bytes of the flags
+        data = text.encode("ascii")
+        packed = bytearray(2 * len(data))
+        low = data.translate(cls._LEGEND_LOW)
+        packed[0::2] = _join_walls(low, self.width, self.height, cls.WALL)
+        packed[1::2] = data.translate(cls._LEGEND_HIGH)
+        cells = array.array("H")
+        cells.frombytes(packed)
+        if sys.byteorder != "little":
+            cells.byteswap()
+
+        self.grid = CellGrid(self.width, self.height, cells)
+        self.paku_rays = WallRays(self.width, self.height, self.blocked_mask(False))
+        self.ghost_rays = WallRays(self.width, self.height, self.blocked_mask(True))
 
         # TODO: assert that every side exit must have a corresponding opposite entry.
 
         return self
 
     def __getitem__(self, index):
-        assert len(index) == 2, f"index must be an integer 2-tuple: not {index}"
+        # The parser lays out rows of the map string one after the other.
+        return self.grid.cells[index[1] * self.width + index[0]]
 
-        # TODO :  is this really correct compared to the parser?
-        return self.grid[index[0] * self.width + index[1]]
+    def ray_table(self, as_ghost):
+        """
+        >>> simple = PacmanMap.from_str(SIMPLE_TEST)
+        >>> simple.ray_table(False).distance(4, 5, (0, -1))
+        1
+        >>> simple.ray_table(True).distance(4, 5, (0, -1))
+        3
+        """
+        return self.ghost_rays if as_ghost else self.paku_rays
+
+    def distance_fields(self, as_ghost):
+        if as_ghost not in self._distance_fields:
+            self._distance_fields[as_ghost] = DistanceFields(self, as_ghost)
+        return self._distance_fields[as_ghost]
+
+    def corridor_graph(self, as_ghost):
+        if as_ghost not in self._corridor_graphs:
+            blocked = self.blocked_mask(as_ghost)
+            gates = self.grid.flag_mask(self.GATE)
+            self._corridor_graphs[as_ghost] = CorridorGraph(
+                self.width, self.height, blocked, gates
+            )
+        return self._corridor_graphs[as_ghost]
 
     def wrapped(self, off):
         if not 0 <= off.x < self.width:
@@ -214,73 +433,124 @@ class PacmanMap:
         for d in dirs:
             yield self.wrapped(loc + d)
 
+    def element_locations(self, flags):
+        """
+        Return (x, y) of each cell with any of `flags` set, ordered by column
+        and then by row.  The map never changes so these are found once.
+        """
+        found = self._elements.get(flags)
+        if found is None:
+            indexes = self._element_indexes.pop(flags, None)
+            if indexes is not None:
+                width = self.width
+                found = [(index % width, index // width) for index in indexes]
+            else:
+                found = self.grid.locations(flags)
+            self._elements[flags] = found
+        return list(found)
+
+    def wall_tiles(self):
+        """
+        Return flat row-major bytes of the wall tile of each cell -- the
+        DIR_MASK bits of a wall and NO_TILE where there is no wall -- for
+        front ends drawing walls from a tile atlas.
+
+        >>> simple = PacmanMap.from_str(SIMPLE_TEST)
+        >>> tiles = simple.wall_tiles()
+        >>> tiles[0], tiles[2 * simple.width + 2], tiles[4 * simple.width + 3]
+        (2, 6, 8)
+        >>> tiles[simple.width] == NO_TILE
+        True
+        """
+        if self._wall_tiles is None:
+            wall, mask = self.WALL, self.DIR_MASK
+            self._wall_tiles = bytes(
+                cell & mask if cell & wall else NO_TILE for cell in self.grid.cells
+            )
+        return self._wall_tiles
+
     def _iter_element(self, elt):
-        for x, y in itertools.product(range(self.width), range(self.height)):
-            if self[x, y] & elt:
-                yield (x, y)
+        return iter(self.element_locations(elt))
+
+    def count_element(self, elt):
+        """
+        >>> simple = PacmanMap.from_str(SIMPLE_TEST)
+        >>> simple.count_element(PacmanMap.COOKIE | PacmanMap.PILL)
+        21
+        """
+        return self.grid.count(elt)
+
+    def blocked_mask(self, as_ghost):
+        """
+        Return a flat row-major bytearray with 1 in each cell a character
+        cannot enter.  Ghosts may pass through gates but paku may not.
+
+        >>> simple = PacmanMap.from_str(SIMPLE_TEST)
+        >>> mask = simple.blocked_mask(as_ghost=False)
+        >>> mask[4 * simple.width + 4], mask[5 * simple.width + 4]
+        (1, 0)
+        >>> simple.blocked_mask(as_ghost=True)[4 * simple.width + 4]
+        0
+        """
+        return self.grid.flag_mask(self.WALL | (0 if as_ghost else self.GATE))
 
     def paku_location(self):
-        pakus = list(self._iter_element(self.PAKU))
+        pakus = self.element_locations(self.PAKU)
         assert len(pakus) == 1
         return pakus[0]
 
     def ghost_locations(self):
-        return list(self._iter_element(self.GHOST))
+        return self.element_locations(self.GHOST)
 
     def pill_locations(self):
-        return list(self._iter_element(self.PILL))
+        return self.element_locations(self.PILL)
 
     def cookie_locations(self):
-        return list(self._iter_element(self.COOKIE))
+        return self.element_locations(self.COOKIE)
 
     def iter_paths(self, prior, first, maxlen):
         """
         Iterate non-backtracking paths with no direct reversals.  Such paths
-        may have loops.
+        may have loops.  Paths are lists of Locations starting with `first`
+        and are walked over the corridor graph of the map.  Small enough
+        results are cached by (prior, first, maxlen).
 
         >>> simple = PacmanMap.from_str(SIMPLE_TEST)
-        >>> paths = list(simple.iter_paths(simple.paku_location(), simple.paku_location() + (1, 0), 3))
+        >>> paku = Location(*simple.paku_location())
+        >>> paths = list(simple.iter_paths(paku, paku + (1, 0), 3))
         >>> paths[0]
-        [Location, Location, Location]
+        [Location(5, 5), Location(6, 5), Location(7, 5)]
+        >>> paths = list(simple.iter_paths(paku, paku + (1, 0), 8))
+        >>> len(paths), paths[0][-1], paths[1][-1]
+        (2, Location(8, 1), Location(6, 1))
         """
 
-        path = [first]
+        graph = self.corridor_graph(False)
+        prior = None if prior is None else graph.index(prior)
+        first = graph.index(first)
 
-        # terminate the recursion
-        if maxlen <= 1:
-            yield path
+        key = (prior, first, maxlen)
+        cached = self._path_cache.get(key)
+        if cached is not None:
+            self._path_cache.move_to_end(key)
+            for path in cached:
+                yield list(path)
             return
 
-        current = first
-
-        def is_wall(loc):
-            return self[loc] & (self.WALL | self.GATE) != 0
-
-        def eligible(loc):
-            nonlocal prior
-            return not is_wall(loc) and loc != prior
-
-        # Construct a path list until a branch
-        while True:
-            open_spots = [adj for adj in self.adjacent(current) if eligible(adj)]
-
-            if len(open_spots) == 1:
-                path.append(open_spots[0])
-                prior = current
-                current = open_spots[0]
-                if len(path) >= maxlen:
-                    yield path
-                    break
-            elif len(open_spots) == 0:
-                # this is a dead end
-                yield path
-                break
-            else:
-                # iterate branch choices
-                for spot in open_spots:
-                    for pnext in self.iter_paths(current, spot, maxlen - len(path)):
-                        yield path + pnext
-                break
+        width = self.width
+        results = []
+        for cells in graph.iter_paths(prior, first, maxlen):
+            path = tuple(Location(cell % width, cell // width) for cell in cells)
+            if results is not None:
+                results.append(path)
+                if len(results) > self.PATH_CACHE_PATHS:
+                    results = None
+            yield list(path)
+
+        if results is not None:
+            self._path_cache[key] = tuple(results)
+            if len(self._path_cache) > self.PATH_CACHE_SIZE:
+                self._path_cache.popitem(last=False)
 
     def iter_ghost_unhome_paths(self):
         """
@@ -299,13 +569,27 @@ class PacmanMap:
         >>> len(paths[1]), paths[1][:-1]
         (3, [Location(4, 4), Location(4, 3)])
         """
-        ghbox = self.WALL | self.GATE | self.GHOST
         ghcount = len(self.ghost_locations())
 
+        for gate, outside in self._iter_gate_exits():
+            for path in self.iter_paths(outside, gate, ghcount + 1):
+                yield path
+
+    def _iter_gate_exits(self):
+        ghbox = self.WALL | self.GATE | self.GHOST
+
         for gate in self._iter_element(self.GATE):
+            gate = Location(*gate)
             outside = [out for out in self.adjacent(gate) if self[out] & ghbox == 0]
             assert len(outside) == 1
-            outside = outside[0]
+            yield gate, outside[0]
 
-            for path in self.iter_paths(self, outside, gate, ghcount + 1):
-                yield path
+    def ghost_exits(self):
+        """
+        Return the cells just outside each ghost box gate.
+
+        >>> simple = PacmanMap.from_str(SIMPLE_TEST)
+        >>> simple.ghost_exits()
+        [Location(4, 5)]
+        """
+        return [outside for _, outside in self._iter_gate_exits()]
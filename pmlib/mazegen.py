@@ -0,0 +1,198 @@
+import itertools
+import random
+
+# Seeded maze maps in the PacmanMap legend.  Corridor cells sit on the odd
+# rows and columns of the grid with wall posts on the even/even cells and
+# wall segments between them.  A spanning tree (sidewinder) makes every
+# corridor reachable, then the remaining inner wall segments are knocked out
+# at random so the maze has loops; `density` is the fraction kept.  Ghost
+# boxes are cut into the maze with a corridor ring around them so nothing is
+# disconnected, and tunnels open matching cells on opposite edges.
+#
+# Everything works on rows of legend bytes so a 1000 x 1000 map takes a few
+# hundred milliseconds.
+
+COOKIE = ord("o")
+PILL = ord("*")
+PAKU = ord("@")
+
+GHOST_BOX = (b"+-=-+", b"|xxx|", b"+---+")
+
+# a ghost box and its ring of corridor
+BOX_WIDTH = 7
+BOX_HEIGHT = 5
+
+MIN_WIDTH = BOX_WIDTH + 4
+MIN_HEIGHT = BOX_HEIGHT + 4
+
+
+def _blank_rows(width, height):
+    posts = bytearray(b"+-" * (width // 2) + b"+")
+    cells = bytearray(b"|o" * (width // 2) + b"|")
+    return [bytearray(posts if y % 2 == 0 else cells) for y in range(height)]
+
+
+def _carve(rows, rng, cols, cell_rows):
+    # sidewinder:  the top row is one corridor and each run of cells in the
+    # rows below opens east until the run closes with one passage north
+    top = rows[1]
+    for i in range(cols - 1):
+        top[2 * i + 2] = COOKIE
+
+    chance = rng.random
+    pick = rng.randrange
+    for j in range(1, cell_rows):
+        row = rows[2 * j + 1]
+        above = rows[2 * j]
+        start = 0
+        for i in range(cols):
+            if i < cols - 1 and chance() < 0.5:
+                row[2 * i + 2] = COOKIE
+            else:
+                above[2 * pick(start, i + 1) + 1] = COOKIE
+                start = i + 1
+
+
+def _braid(rows, rng, width, height, density):
+    # knock out inner wall segments (not posts) with probability 1 - density
+    if density >= 1:
+        return
+    chance = rng.random
+    for y in range(1, height - 1):
+        row = rows[y]
+        first = 1 if y % 2 == 0 else 2
+        for x in range(first, width - 1, 2):
+            if row[x] != COOKIE and chance() >= density:
+                row[x] = COOKIE
+
+
+def _place_boxes(rows, rng, width, height, count):
+    # boxes sit with the ring on corridor rows/columns and apart from each
+    # other; returns the paku start below the first box
+    taken = []
+    paku = None
+    for attempt in range(count * 50):
+        if len(taken) == count:
+            break
+        if attempt == 0:
+            left = (width // 2 - BOX_WIDTH // 2) | 1
+            top = (height // 2 - BOX_HEIGHT // 2) | 1
+        else:
+            left = rng.randrange(1, width - BOX_WIDTH - 1, 2)
+            top = rng.randrange(1, height - BOX_HEIGHT - 1, 2)
+        if left + BOX_WIDTH > width - 1 or top + BOX_HEIGHT > height - 1:
+            continue
+        if any(
+            left < x + BOX_WIDTH + 1
+            and x < left + BOX_WIDTH + 1
+            and top < y + BOX_HEIGHT + 1
+            and y < top + BOX_HEIGHT + 1
+            for x, y in taken
+        ):
+            continue
+        taken.append((left, top))
+
+        for y in range(top, top + BOX_HEIGHT):
+            rows[y][left : left + BOX_WIDTH] = b"o" * BOX_WIDTH
+        for dy, line in enumerate(GHOST_BOX):
+            rows[top + 1 + dy][left + 1 : left + 1 + len(line)] = line
+        if paku is None:
+            paku = (left + 3, top + BOX_HEIGHT - 1)
+
+    if len(taken) < count:
+        raise ValueError(f"no room for {count} ghost boxes")
+    return paku
+
+
+def _open_tunnels(rows, rng, width, height, across, down):
+    # a tunnel opens both ends of one corridor row or column
+    if across:
+        for y in rng.sample(range(1, height - 1, 2), min(across, height // 2)):
+            rows[y][0] = rows[y][width - 1] = COOKIE
+    if down:
+        for x in rng.sample(range(1, width - 1, 2), min(down, width // 2)):
+            rows[0][x] = rows[height - 1][x] = COOKIE
+
+
+def generate(
+    width,
+    height,
+    seed=None,
+    density=0.6,
+    ghost_boxes=1,
+    pills=4,
+    tunnels=1,
+    vertical_tunnels=0,
+):
+    """
+    Return a map string of a `width` x `height` maze (even dimensions are
+    rounded up).  The same seed and options always give the same map.
+
+    >>> from pmlib.maps import PacmanMap
+    >>> text = generate(25, 15, seed=3)
+    >>> text == generate(25, 15, seed=3), text == generate(25, 15, seed=4)
+    (True, False)
+    >>> pmmap = PacmanMap.from_str(text)
+    >>> pmmap.width, pmmap.height, len(pmmap.pill_locations())
+    (25, 15, 4)
+    >>> len(pmmap.ghost_locations()), len(pmmap.ghost_exits())
+    (3, 1)
+
+    Every corridor can be reached from paku's start.
+
+    >>> fields = pmmap.distance_fields(as_ghost=False)
+    >>> start = pmmap.paku_location()
+    >>> open_cells = pmmap.cookie_locations() + pmmap.pill_locations()
+    >>> all(fields.distance(start, cell) is not None for cell in open_cells)
+    True
+
+    A maze may have no ghost boxes; paku then starts in the middle.
+
+    >>> pmmap = PacmanMap.from_str(generate(25, 15, seed=3, ghost_boxes=0, pills=6))
+    >>> pmmap.ghost_locations(), pmmap.paku_location(), len(pmmap.pill_locations())
+    ([], (13, 7), 6)
+    >>> generate(11, 9, seed=3, pills=100)
+    Traceback (most recent call last):
+    ...
+    ValueError: no room for 100 pills
+    """
+    width |= 1
+    height |= 1
+    if width < MIN_WIDTH or height < MIN_HEIGHT:
+        raise ValueError(f"mazes are at least {MIN_WIDTH} x {MIN_HEIGHT}")
+
+    rng = random.Random(seed)
+    rows = _blank_rows(width, height)
+
+    _carve(rows, rng, width // 2, height // 2)
+    _braid(rows, rng, width, height, density)
+    paku = _place_boxes(rows, rng, width, height, ghost_boxes)
+    if paku is None:
+        # no box to start below; the middle cell is always a corridor
+        paku = ((width // 2) | 1, (height // 2) | 1)
+    px, py = paku
+    _open_tunnels(rows, rng, width, height, tunnels, vertical_tunnels)
+
+    # pills go on random corridor cells
+    corridors = [
+        (x, y)
+        for y in range(1, height - 1, 2)
+        for x in range(1, width - 1, 2)
+        if rows[y][x] == COOKIE and (x, y) != paku
+    ]
+    if pills > len(corridors):
+        raise ValueError(f"no room for {pills} pills")
+    for x, y in rng.sample(corridors, pills):
+        rows[y][x] = PILL
+    rows[py][px] = PAKU
+
+    return "\n".join(row.decode("ascii") for row in rows)
+
+
+def endless(width, height, seed=0, **options):
+    """
+    Yield an endless run of different mazes, level after level, starting
+    from `seed`; `options` are passed to generate.
+    """
+    for level in itertools.count(seed):
+        yield generate(width, height, seed=level, **options)
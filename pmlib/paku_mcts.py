@@ -0,0 +1,363 @@
+import hashlib
+import math
+import random
+import threading
+import time
+from . import core
+from . import compiled
+from .rays import DIRECTIONS
+
+# A search based paku logic.  MCTSPaku plays out possible futures on the
+# board itself (PacmanBoard.snapshot and restore) and picks the move whose
+# futures scored best, running Monte-Carlo tree search within a time budget
+# on every iteration.
+#
+# Moves are "macro" moves:  keep going one way for STEP_TICKS iterations (or
+# until a wall).  The tree is open loop -- nodes are sequences of macro moves
+# and collect the rewards of every play-out through them -- so once a move is
+# chosen its subtree becomes the root for the next decision and the search
+# carries on while paku makes the move.  A play-out goes down the tree by
+# UCB1, adds one move, wanders for ROLLOUT_MOVES more moves and scores the
+# points won, less DEATH_PENALTY if paku is caught.
+#
+# Play-outs draw from the agent's own random stream and the board's streams
+# are put back afterwards, so a game with a searching paku still replays
+# from its seed and paku's moves (see pmlib.replay).
+#
+# With an `executor` (from concurrent.futures, threads or processes) each
+# decision also runs `workers` independent searches there and adds their
+# statistics to the root.  Tasks carry only the snapshot and a digest of the
+# map; every worker thread searches on a board of its own for that map.
+# Process pools must be created with `initializer=init_worker` and the map
+# string (and ghost logic) as `initargs` so the map is sent once per worker.
+# Thread pools may do the same to give the ghosts a logic; without it they
+# load the map MCTSPaku left in this process and play the default ghosts.
+
+
+class _Node:
+    __slots__ = ("children", "visits", "total")
+
+    def __init__(self):
+        # direction -> _Node; None until the node is expanded
+        self.children = None
+        self.visits = 0
+        self.total = 0.0
+
+
+class MCTSPaku:
+    """
+    A paku logic function object; set an instance as `board.paku.logic`.
+    With `iterations` each tick runs exactly that many play-outs instead of
+    searching for `budget` seconds, which is reproducible for a given
+    `seed`.
+
+    >>> import pmlib
+    >>> from pmlib import headless
+    >>> board = pmlib.PacmanBoard(seed=3)
+    >>> board.load_from_string(pmlib.level1)
+    >>> board.paku.logic = MCTSPaku(iterations=1, rollout_moves=1, seed=1)
+    >>> result = headless.simulate(board, max_ticks=100)
+    >>> result.score > 0, result.lives_lost
+    (True, 0)
+    """
+
+    # iterations of one macro move (about one cell)
+    STEP_TICKS = 12
+    # macro moves wandered after leaving the tree
+    ROLLOUT_MOVES = 4
+    # seconds of search per tick
+    BUDGET = 0.004
+    EXPLORATION = 1.4
+    DEATH_PENALTY = 500
+    CLEARED_BONUS = 1000
+
+    def __init__(
+        self,
+        budget=None,
+        iterations=None,
+        step_ticks=None,
+        rollout_moves=None,
+        seed=None,
+        executor=None,
+        workers=None,
+    ):
+        self.budget = self.BUDGET if budget is None else budget
+        self.iterations = iterations
+        self.step_ticks = step_ticks or self.STEP_TICKS
+        self.rollout_moves = (
+            self.ROLLOUT_MOVES if rollout_moves is None else rollout_moves
+        )
+        self.random = random.Random(seed)
+        self.executor = executor
+        self.workers = workers or 1
+
+        # root is the node reached when the pending move is done
+        self.root = _Node()
+        self.pending = None
+        self.remaining = 0
+
+        # the direction returned to the board during play-outs
+        self._direction = None
+        # rewards are divided by the largest seen for UCB1
+        self._scale = core.PacmanBoard.COOKIE_POINTS
+        # (map, digest) of the map the executor searches
+        self._map_key = None
+
+    def __call__(self, board, location, state):
+        # the board empties paku's state when a life starts over
+        if "mcts" not in state:
+            state["mcts"] = True
+            self.root = _Node()
+            self.pending = None
+            self.remaining = 0
+
+        if self.remaining > 0 and self._room(board, self.pending) <= board.WALL_BUMPER:
+            self.remaining = 0
+
+        deciding = self.remaining == 0
+        futures = []
+        if deciding and self.executor is not None:
+            if self._map_key is None or self._map_key[0] is not board.map:
+                self._map_key = board.map, _share_map(compiled.dumps(board.map))
+            snapshot = board.snapshot(include_random=False)
+            params = (
+                self._map_key[1],
+                self.step_ticks,
+                self.rollout_moves,
+                self.budget,
+                self.iterations,
+            )
+            futures = [
+                self.executor.submit(
+                    search_task, snapshot, params, self.random.random()
+                )
+                for _ in range(self.workers)
+            ]
+
+        self.search(board)
+
+        if deciding:
+            for future in futures:
+                self._merge(future.result())
+            self._decide(board)
+
+        self.remaining -= 1
+        return self.pending
+
+    def _decide(self, board):
+        children = self.root.children
+        if not children:
+            choices = self._choices(board)
+            self.pending = self.random.choice(choices) if choices else None
+            self.root = _Node()
+        else:
+
+            def merit(direction):
+                child = children[direction]
+                return child.visits, child.total / (child.visits or 1)
+
+            self.pending = max(children, key=merit)
+            self.root = children[self.pending]
+        self.remaining = self.step_ticks
+
+    def _merge(self, stats):
+        if self.root.children is None:
+            self.root.children = {}
+        for direction, (visits, total) in stats.items():
+            child = self.root.children.get(direction)
+            if child is None:
+                child = self.root.children[direction] = _Node()
+            child.visits += visits
+            child.total += total
+            self.root.visits += visits
+
+    def _room(self, board, direction):
+        location = board.paku.location
+        limit = board.wall_limit_from(location, direction)
+        return (
+            (limit.x - location.x) * direction[0]
+            + (limit.y - location.y) * direction[1]
+            - 1
+        )
+
+    def _choices(self, board):
+        return [d for d in DIRECTIONS if self._room(board, d) > board.WALL_BUMPER]
+
+    def _planned(self, board, location, state):
+        return self._direction
+
+    def search(self, board):
+        """
+        Run play-outs from the board as it is now, leaving it unchanged.
+        """
+        snapshot = board.snapshot(include_random=False)
+        streams = board.random, board.paku_random
+        logic = board.paku.logic
+        board.random = board.paku_random = self.random
+        board.paku.logic = self._planned
+        try:
+            if self.iterations is not None:
+                for _ in range(self.iterations):
+                    self._playout(board, snapshot)
+            else:
+                deadline = time.perf_counter() + self.budget
+                while time.perf_counter() < deadline:
+                    self._playout(board, snapshot)
+        finally:
+            board.restore(snapshot)
+            board.random, board.paku_random = streams
+            board.paku.logic = logic
+
+    def _move(self, board, direction, ticks):
+        # play one macro move; return (points, finished)
+        tick = type(board).tick
+        start = board.score
+        self._direction = direction
+        for _ in range(ticks):
+            if self._room(board, direction) <= board.WALL_BUMPER:
+                break
+            outcome = tick(board)
+            if outcome == core.PLAYING:
+                continue
+            points = board.score - start
+            if outcome == core.CLEARED:
+                return points + self.CLEARED_BONUS, True
+            return points - self.DEATH_PENALTY, True
+        return board.score - start, False
+
+    def _playout(self, board, snapshot):
+        board.restore(snapshot)
+        reward = 0
+        finished = False
+
+        if self.remaining > 0:
+            reward, finished = self._move(board, self.pending, self.remaining)
+
+        # down the tree
+        node = self.root
+        path = [node]
+        while not finished and node.children:
+            direction, node = self._select(node)
+            path.append(node)
+            points, finished = self._move(board, direction, self.step_ticks)
+            reward += points
+
+        # add a move
+        if not finished and node.children is None:
+            node.children = {d: _Node() for d in self._choices(board)}
+            if node.children:
+                direction = self.random.choice(list(node.children))
+                node = node.children[direction]
+                path.append(node)
+                points, finished = self._move(board, direction, self.step_ticks)
+                reward += points
+
+        # wander on
+        direction = None
+        for _ in range(self.rollout_moves):
+            if finished:
+                break
+            choices = self._choices(board)
+            if not choices:
+                break
+            if direction not in choices or self.random.random() < 0.2:
+                direction = self.random.choice(choices)
+            points, finished = self._move(board, direction, self.step_ticks)
+            reward += points
+
+        if abs(reward) > self._scale:
+            self._scale = abs(reward)
+        for node in path:
+            node.visits += 1
+            node.total += reward
+
+    def _select(self, node):
+        log_visits = math.log(node.visits + 1)
+        scale = self._scale
+        explore = self.EXPLORATION
+
+        best = None
+        best_value = None
+        for direction, child in node.children.items():
+            if child.visits == 0:
+                return direction, child
+            value = child.total / (child.visits * scale)
+            value += explore * math.sqrt(log_visits / child.visits)
+            if best_value is None or value > best_value:
+                best = direction
+                best_value = value
+        return best, node.children[best]
+
+
+# compiled maps by digest for the worker threads of this process
+_maps = {}
+
+# per-thread board for search_task with the digest of its map & ghost logic
+_worker = threading.local()
+
+
+def _share_map(data):
+    key = hashlib.blake2b(data, digest_size=16).hexdigest()
+    _maps[key] = data
+    return key
+
+
+def _load_worker(key, ghost_logic):
+    data = _maps.get(key)
+    if data is None:
+        raise RuntimeError(
+            "the worker has no board for this map; create the executor with "
+            "initializer=init_worker and the map string as initargs"
+        )
+    board = core.PacmanBoard()
+    board.load_map(compiled.loads(data))
+    if ghost_logic is not None:
+        for ghost in board.ghosts:
+            ghost.logic = ghost_logic
+    _worker.board = board
+    _worker.key = key
+    _worker.ghost_logic = ghost_logic
+
+
+def init_worker(map_string, ghost_logic=None):
+    """
+    Set up the board of a worker thread or process with `ghost_logic` for
+    the ghosts; use as the `initializer` of an executor.
+    """
+    key = _share_map(compiled.dumps(compiled.load_string(map_string)))
+    _load_worker(key, ghost_logic)
+
+
+def search_task(snapshot, params, seed):
+    """
+    Search from `snapshot` on the worker's board and return the visits and
+    total reward of each first move.
+
+    >>> import pmlib
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> board = pmlib.PacmanBoard(seed=3)
+    >>> board.load_from_string(pmlib.level1)
+    >>> with ThreadPoolExecutor(2) as executor:
+    ...     board.paku.logic = MCTSPaku(
+    ...         iterations=2, rollout_moves=1, seed=1, executor=executor, workers=2
+    ...     )
+    ...     result = pmlib.headless.simulate(board, max_ticks=60)
+    >>> result.score > 0
+    True
+    """
+    key, step_ticks, rollout_moves, budget, iterations = params
+    if getattr(_worker, "key", None) != key:
+        _load_worker(key, getattr(_worker, "ghost_logic", None))
+    board = _worker.board
+    board.restore(snapshot)
+
+    agent = MCTSPaku(
+        budget=budget,
+        iterations=iterations,
+        step_ticks=step_ticks,
+        rollout_moves=rollout_moves,
+        seed=seed,
+    )
+    agent.search(board)
+    children = agent.root.children or {}
+    return {d: (child.visits, child.total) for d, child in children.items()}
@@ -0,0 +1,28 @@
+# This is an out-of-the-box paku logic implementation for unattended games
+# (headless evaluation, batch runs and demos).  Paku wanders the corridors
+# choosing a new direction at random only when the current one is blocked or
+# on an occasional whim.
+
+
+def wander_logic(board, location, state):
+    directions = board.allowable_directions(location, False)
+
+    # the limit is the wall cell so the room to move is one less
+    def room(limit):
+        return (location - limit).manhattan() - 1
+
+    current = state.get("current_direction")
+    if current and room(directions[current]) > board.WALL_BUMPER:
+        if board.paku_random.random() > 0.01:
+            return current
+
+    choices = [
+        kdir for kdir, limit in directions.items() if room(limit) > board.WALL_BUMPER
+    ]
+
+    if not choices:
+        return None
+
+    newdir = board.paku_random.choice(choices)
+    state["current_direction"] = newdir
+    return newdir
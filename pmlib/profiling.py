@@ -0,0 +1,218 @@
+import json
+import math
+import time
+
+# Per-phase timings of the game loop.  A TickProfiler attached to a board
+# replaces the board's phase methods and the characters' logic functions
+# with timed wrappers on the instances; detaching puts the originals back, so
+# a board that was never profiled runs exactly the code it always did.
+#
+# Timings go into log-scaled histograms of fixed size (eight buckets per
+# doubling) so recording costs a couple of arithmetic operations whatever
+# the number of samples and percentiles are good to about 9%.
+
+_perf_counter = time.perf_counter
+_log2 = math.log2
+
+# marks an attribute which was not set on the instance before attaching
+_MISSING = object()
+
+# bucket 0 holds everything under 100ns
+FLOOR = 1e-7
+PER_DOUBLING = 8
+BUCKETS = 30 * PER_DOUBLING
+
+# the phases timed by TickProfiler.attach and play
+PHASES = (
+    "tick",
+    "play_paku",
+    "paku_logic",
+    "play_ghost",
+    "ghost_logic",
+    "collisions",
+    "render",
+)
+
+
+class Histogram:
+    """
+    >>> hist = Histogram()
+    >>> for ms in range(1, 101):
+    ...     hist.record(ms / 1000)
+    >>> hist.count, round(hist.total, 3), hist.max
+    (100, 5.05, 0.1)
+    >>> 0.047 < hist.percentile(50) < 0.055, 0.095 < hist.percentile(99) < 0.11
+    (True, True)
+    """
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > FLOOR:
+            index = int(_log2(seconds / FLOOR) * PER_DOUBLING) + 1
+            self.buckets[index if index < BUCKETS else BUCKETS - 1] += 1
+        else:
+            self.buckets[0] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """
+        Return the upper edge of the bucket holding the `percent` percentile
+        (never more than the largest sample).
+        """
+        if not self.count:
+            return 0.0
+        wanted = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                edge = FLOOR * 2 ** (index / PER_DOUBLING)
+                return min(edge, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class TickProfiler:
+    """
+    Time the phases of each game iteration.  A tick taking longer than
+    `budget` seconds (the iteration cadence by default) is an overrun.
+
+    >>> import pmlib
+    >>> board = pmlib.PacmanBoard()
+    >>> board.load_from_string(pmlib.level1)
+    >>> board.paku.logic = lambda board, location, state: (1, 0)
+    >>> profiler = TickProfiler()
+    >>> profiler.attach(board)
+    >>> for _ in range(20):
+    ...     outcome = board.tick()
+    >>> profiler.detach()
+    >>> stats = profiler.as_dict()
+    >>> stats["phases"]["tick"]["count"], stats["phases"]["play_ghost"]["count"]
+    (20, 80)
+    >>> "tick" in board.__dict__
+    False
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.histograms = {name: Histogram() for name in PHASES}
+        self.overruns = 0
+        self._restore = []
+
+    def timed(self, name, function):
+        """
+        Return `function` wrapped to record its duration under `name`.
+        """
+        record = self.histograms.setdefault(name, Histogram()).record
+
+        def wrapper(*args, **kwargs):
+            start = _perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(_perf_counter() - start)
+
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    def _timed_tick(self, tick):
+        record = self.histograms["tick"].record
+
+        def wrapper():
+            start = _perf_counter()
+            result = tick()
+            elapsed = _perf_counter() - start
+            record(elapsed)
+            if elapsed > self.budget:
+                self.overruns += 1
+            return result
+
+        return wrapper
+
+    def _replace(self, owner, attribute, replacement):
+        original = owner.__dict__.get(attribute, _MISSING)
+        self._restore.append((owner, attribute, original))
+        setattr(owner, attribute, replacement)
+
+    def attach(self, board):
+        """
+        Start timing `board`.  Attach after the map is loaded and the logic
+        functions are set since both replace what is wrapped here.
+        """
+        assert not self._restore, "already attached"
+        if self.budget is None:
+            self.budget = board.LOOP_SLEEP_SECONDS
+
+        self._replace(board, "tick", self._timed_tick(board.tick))
+        self._replace(board, "play_paku", self.timed("play_paku", board.play_paku))
+        self._replace(board, "play_ghost", self.timed("play_ghost", board.play_ghost))
+        self._replace(
+            board, "collided_ghosts", self.timed("collisions", board.collided_ghosts)
+        )
+
+        paku = board.paku
+        self._replace(paku, "logic", self.timed("paku_logic", paku.logic))
+        for ghost in board.ghosts:
+            self._replace(ghost, "logic", self.timed("ghost_logic", ghost.logic))
+
+    def detach(self):
+        for owner, attribute, original in reversed(self._restore):
+            if original is _MISSING:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, original)
+        self._restore = []
+
+    def as_dict(self):
+        return {
+            "budget": self.budget,
+            "overruns": self.overruns,
+            "phases": {
+                name: hist.as_dict()
+                for name, hist in self.histograms.items()
+                if hist.count
+            },
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def summary(self):
+        """
+        Return a short multi-line text table of the timings so far.
+        """
+        lines = [
+            f"{'phase':<12} {'count':>8} {'p50 us':>9} {'p99 us':>9} {'max us':>9}"
+        ]
+        for name, hist in self.histograms.items():
+            if not hist.count:
+                continue
+            lines.append(
+                f"{name:<12} {hist.count:>8} {hist.percentile(50) * 1e6:>9.1f} "
+                f"{hist.percentile(99) * 1e6:>9.1f} {hist.max * 1e6:>9.1f}"
+            )
+        budget = (self.budget or 0) * 1e3
+        lines.append(f"overruns {self.overruns} (budget {budget:.1f} ms)")
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is an optional accelerator
+    numpy = None
+
+# Per-cell wall look-ups precomputed when a map is loaded.  A ray is the
+# number of steps from a cell in one of the four travel directions until a
+# blocked cell is reached.  Rays wrap around the map edges just as characters
+# do in tunnels.  A line without any blocked cell has rays the length of the
+# line (you come back around to where you started).
+
+DIRECTIONS = ((0, 1), (1, 0), (-1, 0), (0, -1))
+
+# neighbour offsets in bit order for the neighbour masks
+NEIGHBOURS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+NEIGHBOUR_BITS = {offset: 1 << index for index, offset in enumerate(NEIGHBOURS)}
+
+
+def _line_rays(blocked, n):
+    """
+    Distance forward from each position of the cyclic line `blocked` to the
+    next blocked position.
+
+    >>> _line_rays([0, 1, 0, 0], 4)
+    [1, 4, 3, 2]
+    >>> _line_rays([0, 0], 2)
+    [2, 2]
+    """
+    result = [n] * n
+    next_wall = None
+    for i in range(2 * n - 1, -1, -1):
+        if i < n and next_wall is not None:
+            result[i] = min(next_wall - i, n)
+        if blocked[i % n]:
+            next_wall = i
+    return result
+
+
+def _python_rays(width, height, blocked):
+    rays = {d: array.array("H", bytes(2 * width * height)) for d in DIRECTIONS}
+
+    for y in range(height):
+        row = blocked[y * width : (y + 1) * width]
+        east = _line_rays(row, width)
+        west = _line_rays(row[::-1], width)[::-1]
+        rays[(1, 0)][y * width : (y + 1) * width] = array.array("H", east)
+        rays[(-1, 0)][y * width : (y + 1) * width] = array.array("H", west)
+
+    for x in range(width):
+        column = blocked[x::width]
+        south = _line_rays(column, height)
+        north = _line_rays(column[::-1], height)[::-1]
+        for y in range(height):
+            rays[(0, 1)][y * width + x] = south[y]
+            rays[(0, -1)][y * width + x] = north[y]
+
+    neighbours = array.array("B", bytes(width * height))
+    for y in range(height):
+        for x in range(width):
+            bits = 0
+            for (dx, dy), bit in NEIGHBOUR_BITS.items():
+                if blocked[((y + dy) % height) * width + (x + dx) % width]:
+                    bits |= bit
+            neighbours[y * width + x] = bits
+
+    return rays, neighbours
+
+
+def _numpy_forward(grid):
+    # distance along axis 1 to the next True with wrap-around
+    height, width = grid.shape
+    doubled = numpy.concatenate([grid, grid], axis=1)
+    index = numpy.arange(2 * width)
+    pos = numpy.where(doubled, index, 4 * width)
+    nearest = numpy.minimum.accumulate(pos[:, ::-1], axis=1)[:, ::-1]
+    return numpy.minimum(nearest[:, 1 : width + 1] - index[:width], width)
+
+
+def _numpy_rays(width, height, blocked):
+    grid = numpy.frombuffer(bytes(blocked), dtype=numpy.uint8).reshape(height, width)
+    grid = grid != 0
+
+    def packed(values):
+        return array.array("H", values.astype(numpy.uint16).tobytes())
+
+    rays = {
+        (1, 0): packed(_numpy_forward(grid)),
+        (-1, 0): packed(_numpy_forward(grid[:, ::-1])[:, ::-1]),
+        (0, 1): packed(_numpy_forward(grid.T).T),
+        (0, -1): packed(_numpy_forward(grid.T[:, ::-1])[:, ::-1].T),
+    }
+
+    bits = numpy.zeros((height, width), dtype=numpy.uint8)
+    for (dx, dy), bit in NEIGHBOUR_BITS.items():
+        shifted = numpy.roll(grid, shift=(-dy, -dx), axis=(0, 1))
+        bits |= numpy.where(shifted, bit, 0).astype(numpy.uint8)
+
+    return rays, array.array("B", bits.tobytes())
+
+
+class WallRays:
+    """
+    Constant time wall look-ups for one set of blocking cells.  Coordinates
+    are wrapped onto the map so they may stray off the edge in tunnels.
+
+    >>> blocked = bytearray([1, 1, 1, 1,
+    ...                      0, 0, 0, 1,
+    ...                      1, 0, 1, 1])
+    >>> rays = WallRays(4, 3, blocked)
+    >>> rays.distance(1, 1, (1, 0)), rays.distance(1, 1, (-1, 0))
+    (2, 2)
+    >>> rays.distance(1, 1, (0, 1)), rays.distance(1, 1, (0, -1))
+    (2, 1)
+    >>> rays.is_blocked(-1, 1), rays.is_blocked(4, 1)
+    (True, False)
+    >>> rays.is_blocked_towards(1, 1, 1, 1), rays.is_blocked_towards(1, 1, 0, 1)
+    (True, False)
+    """
+
+    __slots__ = ("width", "height", "blocked", "rays", "neighbours")
+
+    def __init__(self, width, height, blocked):
+        self.width = width
+        self.height = height
+        self.blocked = bytearray(blocked)
+
+        if numpy is not None:
+            self.rays, self.neighbours = _numpy_rays(width, height, self.blocked)
+        else:
+            self.rays, self.neighbours = _python_rays(width, height, self.blocked)
+
+    @classmethod
+    def from_tables(cls, width, height, blocked, rays, neighbours):
+        """
+        Return WallRays using already computed tables (see
+        pmlib.compiled) rather than computing them.
+        """
+        self = cls.__new__(cls)
+        self.width = width
+        self.height = height
+        self.blocked = blocked
+        self.rays = rays
+        self.neighbours = neighbours
+        return self
+
+    def is_blocked(self, x, y):
+        return self.blocked[(y % self.height) * self.width + x % self.width] != 0
+
+    def distance(self, x, y, direction):
+        """
+        Return the number of steps in `direction` from (x, y) to the first
+        blocked cell.
+        """
+        table = self.rays[(direction[0], direction[1])]
+        return table[(y % self.height) * self.width + x % self.width]
+
+    def is_blocked_towards(self, x, y, dx, dy):
+        """
+        Return True if the neighbour at offset (dx, dy) of (x, y) is blocked.
+        Offsets must be within one cell so diagonals are covered.
+        """
+        bits = self.neighbours[(y % self.height) * self.width + x % self.width]
+        return bits & NEIGHBOUR_BITS[(dx, dy)] != 0
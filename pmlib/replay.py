@@ -0,0 +1,239 @@
+import collections
+import struct
+from . import core
+from .rays import DIRECTIONS
+
+# Recording and replaying games.  A game is decided by its map, the board's
+# seed (which drives the rules and ghost logic, see PacmanBoard.random) and
+# the direction paku's logic picks each iteration, so only those are
+# recorded.  Directions are stored as runs of one byte code and a varint
+# count; paku holds a direction for many iterations at a time so a long game
+# takes a few hundred bytes beyond the map.
+#
+# Paku logic being recorded must draw any randomness from `paku_random` (or
+# none at all), otherwise the ghosts' stream differs on replay.  The ghost
+# logic is code and is not recorded; a game played with other than the
+# default ghosts is replayed by giving the Replayer the same `ghost_logic`.
+
+MAGIC = b"PREC"
+VERSION = 1
+
+# magic, version, reserved, seed, map length
+_HEADER = struct.Struct("<4sHHQI")
+
+# direction codes are indexes into DIRECTIONS; NO_MOVE is a None direction
+NO_MOVE = len(DIRECTIONS)
+_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+_DIRECTIONS = DIRECTIONS + (None,)
+
+Recording = collections.namedtuple("Recording", ["seed", "map_string", "codes"])
+
+
+def _write_varint(stream, value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    stream.write(out)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Recorder:
+    """
+    Record the game on `board` to the binary `stream` from now on.  Create
+    it right after loading `map_string` on a new board and before the first
+    iteration; call close when the game is over.
+
+    >>> import io, pmlib
+    >>> from pmlib import paku_ootb
+    >>> board = pmlib.PacmanBoard(seed=11)
+    >>> board.load_from_string(pmlib.level1)
+    >>> board.paku.logic = paku_ootb.wander_logic
+    >>> stream = io.BytesIO()
+    >>> recorder = Recorder(stream, board, pmlib.level1)
+    >>> outcomes = [board.tick() for _ in range(2000)]
+    >>> recorder.close()
+    >>> len(stream.getvalue()) - len(pmlib.level1) < 300
+    True
+
+    The replay arrives at the same place and can go back and forth.
+
+    >>> replayer = Replayer(read(io.BytesIO(stream.getvalue())), snapshot_ticks=500)
+    >>> replayer.run()
+    >>> replayer.tick, replayer.board.score == board.score
+    (2000, True)
+    >>> replayer.board.ghosts[2].location == board.ghosts[2].location
+    True
+    >>> replayer.seek(1234)
+    >>> replayer.tick, replayer.board.score <= board.score
+    (1234, True)
+    """
+
+    def __init__(self, stream, board, map_string):
+        self.stream = stream
+        self.ticks = 0
+
+        encoded = map_string.encode("utf-8")
+        stream.write(_HEADER.pack(MAGIC, VERSION, 0, board.seed, len(encoded)))
+        stream.write(encoded)
+
+        self._code = None
+        self._run = 0
+
+        logic = board.paku.logic
+
+        def recording(board, location, state):
+            direction = logic(board, location, state)
+            self.add(direction)
+            return direction
+
+        board.paku.logic = recording
+
+    def add(self, direction):
+        code = NO_MOVE if direction is None else _CODES[tuple(direction)]
+        self.ticks += 1
+        if code == self._code:
+            self._run += 1
+            return
+        self._flush()
+        self._code = code
+        self._run = 1
+
+    def _flush(self):
+        if self._run:
+            self.stream.write(bytes([self._code]))
+            _write_varint(self.stream, self._run)
+            self._run = 0
+
+    def close(self):
+        self._flush()
+        self.stream.flush()
+
+
+def read(stream):
+    """
+    Return the Recording in the binary `stream`; `codes` holds one direction
+    code per iteration.
+    """
+    data = stream.read()
+    if len(data) < _HEADER.size:
+        raise ValueError("not a game recording")
+    magic, version, _, seed, length = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a game recording of a known version")
+
+    offset = _HEADER.size
+    map_string = data[offset : offset + length].decode("utf-8")
+    offset += length
+
+    codes = bytearray()
+    while offset < len(data):
+        code = data[offset]
+        run, offset = _read_varint(data, offset + 1)
+        codes += bytes([code]) * run
+    return Recording(seed, map_string, bytes(codes))
+
+
+class Replayer:
+    """
+    Re-play a Recording on a fresh board as fast as the rules run, with
+    `ghost_logic` for every ghost if the game was played with it.  A
+    snapshot of the board is kept every `snapshot_ticks` iterations so seek
+    can go back to any iteration quickly.
+
+    >>> import io, pmlib
+    >>> from pmlib import ghost_ootb, paku_ootb
+    >>> board = pmlib.PacmanBoard(seed=2)
+    >>> board.load_from_string(pmlib.level1)
+    >>> board.paku.logic = paku_ootb.wander_logic
+    >>> for ghost in board.ghosts:
+    ...     ghost.logic = ghost_ootb.chase_logic
+    >>> stream = io.BytesIO()
+    >>> recorder = Recorder(stream, board, pmlib.level1)
+    >>> outcomes = [board.tick() for _ in range(1500)]
+    >>> recorder.close()
+    >>> recording = read(io.BytesIO(stream.getvalue()))
+    >>> replayer = Replayer(recording, ghost_logic=ghost_ootb.chase_logic)
+    >>> replayer.run()
+    >>> replayer.board.score == board.score
+    True
+    >>> def places(board):
+    ...     return [ghost.location for ghost in board.ghosts]
+    >>> places(replayer.board) == places(board)
+    True
+    """
+
+    SNAPSHOT_TICKS = 1000
+
+    def __init__(self, recording, snapshot_ticks=None, ghost_logic=None):
+        self.recording = recording
+        self.snapshot_ticks = snapshot_ticks or self.SNAPSHOT_TICKS
+
+        self.board = core.PacmanBoard(seed=recording.seed)
+        self.board.load_from_string(recording.map_string)
+        self.board.paku.logic = self._recorded_direction
+        if ghost_logic is not None:
+            for ghost in self.board.ghosts:
+                ghost.logic = ghost_logic
+
+        # iterations played so far
+        self.tick = 0
+        self.outcome = core.PLAYING
+        self.snapshots = {0: self._snapshot()}
+
+    @property
+    def ticks(self):
+        return len(self.recording.codes)
+
+    def _snapshot(self):
+        return self.board.snapshot(), self.outcome
+
+    def _recorded_direction(self, board, location, state):
+        return _DIRECTIONS[self.recording.codes[self.tick]]
+
+    def step(self):
+        """
+        Play the next recorded iteration and return its outcome.
+        """
+        if self.tick >= self.ticks:
+            raise IndexError("the recording is over")
+        self.outcome = self.board.tick()
+        self.tick += 1
+        if self.tick % self.snapshot_ticks == 0:
+            self.snapshots[self.tick] = self._snapshot()
+        return self.outcome
+
+    def run(self, until=None):
+        """
+        Play on to iteration `until` (the end of the recording by default).
+        """
+        until = self.ticks if until is None else min(until, self.ticks)
+        step = self.step
+        while self.tick < until:
+            step()
+
+    def seek(self, tick):
+        """
+        Put the board as it was after `tick` iterations.
+        """
+        if not tick < self.tick:
+            self.run(tick)
+            return
+
+        start = tick - tick % self.snapshot_ticks
+        snapshot, self.outcome = self.snapshots[start]
+        self.board.restore(snapshot)
+        self.tick = start
+        self.run(tick)
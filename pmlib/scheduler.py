@@ -0,0 +1,141 @@
+import time
+
+# A fixed time step game loop.  Game logic advances in steps of exactly
+# `step_seconds` of accumulated wall clock time regardless of how long each
+# step or render takes, so character speed does not drift with render cost or
+# host load.  Rendering happens at its own rate and is told how far between
+# the last two steps the present moment falls so positions can be
+# interpolated.
+
+
+class SchedulerStats:
+    """
+    Counters describing how well a FixedStepScheduler kept to its schedule.
+    Jitter is how late each step began compared to its ideal start time.
+    An overrun is a loop iteration which fell so far behind that steps were
+    dropped rather than run.
+    """
+
+    def __init__(self):
+        self.ticks = 0
+        self.renders = 0
+        self.dropped_ticks = 0
+        self.overruns = 0
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+
+    @property
+    def jitter_mean(self):
+        return self.jitter_total / self.ticks if self.ticks else 0.0
+
+    def as_dict(self):
+        return {
+            "ticks": self.ticks,
+            "renders": self.renders,
+            "dropped_ticks": self.dropped_ticks,
+            "overruns": self.overruns,
+            "jitter_mean": self.jitter_mean,
+            "jitter_max": self.jitter_max,
+        }
+
+
+class FixedStepScheduler:
+    """
+    Run `step` every `step_seconds` and `render` every `render_seconds`.
+
+    >>> now = [0.0]
+    >>> def clock():
+    ...     return now[0]
+    >>> def sleep(seconds):
+    ...     now[0] += seconds
+    >>> steps = []
+    >>> def step():
+    ...     steps.append(clock())
+    ...     return "done" if len(steps) == 10 else None
+    >>> alphas = []
+    >>> sched = FixedStepScheduler(0.01, 0.025, clock=clock, sleep=sleep)
+    >>> sched.run(step, alphas.append)
+    'done'
+    >>> sched.stats.ticks, sched.stats.renders, sched.stats.dropped_ticks
+    (10, 4, 0)
+    """
+
+    # never run more than this many steps to catch up before rendering
+    MAX_CATCHUP = 5
+
+    # floating point slack when comparing accumulated time to a step
+    EPSILON = 1e-9
+
+    def __init__(
+        self,
+        step_seconds,
+        render_seconds=None,
+        max_catchup=None,
+        clock=time.perf_counter,
+        sleep=time.sleep,
+    ):
+        self.step_seconds = step_seconds
+        self.render_seconds = render_seconds or step_seconds
+        self.max_catchup = max_catchup or self.MAX_CATCHUP
+        self.clock = clock
+        self.sleep = sleep
+
+        self.stats = SchedulerStats()
+
+    def run(self, step, render):
+        """
+        Loop until `step` returns something other than None and return that
+        value.  `render` receives the fraction of a step elapsed since the
+        last step.
+        """
+        clock = self.clock
+        dt = self.step_seconds
+        due = dt - self.EPSILON
+        stats = self.stats
+
+        start = previous = clock()
+        next_render = start
+        accumulator = 0.0
+        scheduled = 0
+
+        while True:
+            now = clock()
+            accumulator += now - previous
+            previous = now
+
+            steps = 0
+            while accumulator >= due:
+                if steps >= self.max_catchup:
+                    dropped = int((accumulator + self.EPSILON) // dt)
+                    accumulator -= dropped * dt
+                    scheduled += dropped
+                    stats.dropped_ticks += dropped
+                    stats.overruns += 1
+                    break
+
+                lateness = clock() - (start + (scheduled + 1) * dt)
+                if lateness > 0:
+                    stats.jitter_total += lateness
+                    stats.jitter_max = max(stats.jitter_max, lateness)
+
+                result = step()
+                accumulator -= dt
+                scheduled += 1
+                steps += 1
+                stats.ticks += 1
+
+                if result is not None:
+                    return result
+
+            now = clock()
+            if now >= next_render:
+                render(accumulator / dt)
+                stats.renders += 1
+                next_render += self.render_seconds
+                if next_render < now:
+                    next_render = now + self.render_seconds
+
+            next_step = previous + dt - accumulator
+            wait = min(next_step, next_render) - clock()
+            if wait > 0:
+                self.sleep(wait)
@@ -0,0 +1,113 @@
+from .maps import Location
+
+# Bread-crumb trails:  the cells a ghost is going to walk through in order.
+# A trail is a list of cells and a cursor to the next one, so following it
+# costs nothing per step.  A trail may be flagged for replanning, in which
+# case the board hands control back to the ghost's logic whenever a crumb at
+# a junction is reached -- between junctions there is no choice to make so
+# nothing can be gained by asking.
+#
+# When the ghost's target drifts, `retarget` repairs the trail instead of
+# planning again:  the few cells from the old target to the new one are
+# found by a small local search and appended (cutting out any loop this
+# makes).  Only when the target has wandered further than `tolerance` steps
+# in total since the last full plan is the whole trail computed afresh.
+
+
+class Trail:
+    """
+    >>> trail = Trail([Location(1, 1), Location(2, 1), Location(3, 1)])
+    >>> trail.next, len(trail), trail.advance(), len(trail)
+    (Location(1, 1), 3, Location(1, 1), 2)
+    >>> list(trail), trail.target
+    ([Location(2, 1), Location(3, 1)], Location(3, 1))
+    """
+
+    __slots__ = ("cells", "cursor", "replan", "due", "drift")
+
+    def __init__(self, cells=(), replan=False):
+        self.cells = list(cells)
+        self.cursor = 0
+        # hand back to the logic at junctions; `due` is set when one is reached
+        self.replan = replan
+        self.due = False
+        # steps the target has been moved by repairs since the last plan
+        self.drift = 0
+
+    def __len__(self):
+        return len(self.cells) - self.cursor
+
+    def __bool__(self):
+        return self.cursor < len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells[self.cursor :])
+
+    def __repr__(self):
+        return f"Trail({list(self)!r})"
+
+    @property
+    def next(self):
+        return self.cells[self.cursor]
+
+    @property
+    def target(self):
+        return self.cells[-1] if self else None
+
+    def advance(self):
+        cell = self.cells[self.cursor]
+        self.cursor += 1
+        return cell
+
+    def copy(self):
+        other = Trail(self.cells[self.cursor :], self.replan)
+        other.due = self.due
+        other.drift = self.drift
+        return other
+
+    def retarget(self, fields, source, target, tolerance):
+        """
+        Make the trail lead from `source` (the cell the ghost is leaving) to
+        `target` using the DistanceFields `fields`, repairing the present
+        trail if the target has moved only a little.  Returns True when the
+        trail was repaired rather than planned afresh.
+
+        >>> from pmlib.maps import PacmanMap, SIMPLE_TEST
+        >>> fields = PacmanMap.from_str(SIMPLE_TEST).distance_fields(False)
+        >>> trail = Trail()
+        >>> trail.retarget(fields, (4, 5), (1, 4), tolerance=3)
+        False
+        >>> list(trail)
+        [Location(3, 5), Location(2, 5), Location(1, 5), Location(1, 4)]
+        >>> trail.retarget(fields, (4, 5), (1, 3), tolerance=3), trail.target
+        (True, Location(1, 3))
+        >>> trail.retarget(fields, (4, 5), (1, 4), tolerance=3), list(trail)[-2:]
+        (True, [Location(1, 5), Location(1, 4)])
+        """
+        target = Location(target[0], target[1])
+        if self and self.target == target:
+            return True
+
+        if self and self.drift < tolerance:
+            detour = fields.local_trail(self.target, target, tolerance - self.drift)
+            if detour is not None:
+                self._extend(detour, tolerance)
+                self.drift += len(detour)
+                return True
+
+        self.cells = fields.trail(source, target)
+        self.cursor = 0
+        self.drift = 0
+        return False
+
+    def _extend(self, detour, tolerance):
+        # a detour stepping back onto the trail closes a loop; cut it out
+        cells = self.cells
+        earliest = max(self.cursor, len(cells) - 2 * tolerance - 1)
+        for step, cell in enumerate(reversed(detour)):
+            for index in range(len(cells) - 1, earliest - 1, -1):
+                if cells[index] == cell:
+                    del cells[index + 1 :]
+                    cells.extend(detour[len(detour) - step :])
+                    return
+        cells.extend(detour)
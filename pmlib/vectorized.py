@@ -0,0 +1,413 @@
+import numpy
+from . import collision
+from . import core
+from .rays import DIRECTIONS, NEIGHBOUR_BITS
+
+# Many boards on one PacmanMap advanced in lockstep.  All mutable game state
+# lives in numpy arrays with a leading board axis so each rule of
+# `pmlib.core.PacmanBoard.tick` (moving, eating, empowerment and collisions)
+# is a handful of array operations covering every board at once.  Paku is
+# steered by an array of direction indexes per step (reinforcement learning
+# style) and ghosts run a vectorized equivalent of `ghost_ootb.simple_logic`.
+# Collisions are swept over the iteration's moves like PacmanBoard's (see
+# pmlib.collision).  numpy is required for this module.
+
+# outcome codes per board returned by BoardBatch.step
+PLAYING, CLEARED, CAUGHT, LOST = range(4)
+
+# direction index -1 means no move
+DIRS = numpy.array(DIRECTIONS, dtype=numpy.int64)
+
+# NEIGHBOUR_BITS as an array indexed by [dy + 1, dx + 1]
+BITS = numpy.zeros((3, 3), dtype=numpy.uint8)
+for (_dx, _dy), _bit in NEIGHBOUR_BITS.items():
+    BITS[_dy + 1, _dx + 1] = _bit
+
+
+def swept_separation(start1, end1, start2, end2):
+    """
+    The vector form of collision.swept_separation over the trailing axis of
+    (x, y) location arrays; moves longer than collision.JUMP are not swept.
+
+    >>> start = numpy.array([[1.0, 1.0], [1.0, 1.0]])
+    >>> end = numpy.array([[2.0, 1.0], [2.0, 1.0]])
+    >>> swept_separation(start, end, end, start).tolist()
+    [0.0, 0.0]
+    >>> swept_separation(start, end, start + [0, 1], end + [0, 1]).tolist()
+    [1.0, 1.0]
+    """
+    jumped = numpy.abs(end1 - start1).sum(axis=-1, keepdims=True) > collision.JUMP
+    start1 = numpy.where(jumped, end1, start1)
+    jumped = numpy.abs(end2 - start2).sum(axis=-1, keepdims=True) > collision.JUMP
+    start2 = numpy.where(jumped, end2, start2)
+
+    # the separation is convex along the moves so its least value is at an
+    # end or where the x or y separation passes zero
+    s = start1 - start2
+    e = end1 - end2
+    best = numpy.minimum(numpy.abs(s).sum(axis=-1), numpy.abs(e).sum(axis=-1))
+    for axis in (0, 1):
+        a, b = s[..., axis], e[..., axis]
+        crossed = ((a < 0) != (b < 0)) & (a != b)
+        t = a / numpy.where(crossed, a - b, 1)
+        other = s[..., 1 - axis] + (e[..., 1 - axis] - s[..., 1 - axis]) * t
+        best = numpy.where(crossed, numpy.minimum(best, numpy.abs(other)), best)
+    return best
+
+
+def _ray_arrays(rays):
+    tables = [numpy.frombuffer(rays.rays[d], dtype=numpy.uint16) for d in DIRECTIONS]
+    return (
+        numpy.stack(tables).astype(numpy.int64),
+        numpy.frombuffer(rays.neighbours, dtype=numpy.uint8),
+    )
+
+
+class BoardBatch:
+    """
+    >>> import pmlib
+    >>> pmmap = pmlib.maps.PacmanMap.from_str(pmlib.level1)
+    >>> batch = BoardBatch(pmmap, 3, seed=5)
+    >>> east = numpy.full(3, 1)
+    >>> for _ in range(10):
+    ...     outcomes = batch.step(east)
+    >>> batch.paku_pos[:, 0].round(2).tolist(), batch.score.tolist()
+    ([12.8, 12.8, 12.8], [10, 10, 10])
+    >>> int(batch.cookies.sum()) == 3 * (len(pmmap.cookie_locations()) - 1)
+    True
+    """
+
+    def __init__(self, pmmap, boards, ghost_count=None, seed=None):
+        self.map = pmmap
+        self.boards = boards
+        if ghost_count is None:
+            ghost_count = core.PacmanBoard.GHOST_COUNT
+        self.ghost_count = ghost_count
+        self.rng = numpy.random.default_rng(seed)
+
+        rules = core.PacmanBoard
+        self.move_distance = rules.MOVE_DISTANCE
+        self.corner_correct = rules.CORNER_CORRECT
+        self.wall_bumper = rules.WALL_BUMPER
+        self.epsilon = rules.EPSILON
+        self.collision_close = rules.COLLISION_CLOSE
+
+        self.width = pmmap.width
+        self.height = pmmap.height
+
+        self.paku_rays, self.paku_neighbours = _ray_arrays(pmmap.ray_table(False))
+        self.ghost_rays, self.ghost_neighbours = _ray_arrays(pmmap.ray_table(True))
+
+        cells = self.width * self.height
+        view = pmmap.grid.view().reshape(cells)
+        self.start_cookies = (view & pmmap.COOKIE) != 0
+        self.start_pills = (view & pmmap.PILL) != 0
+        self.paku_start = numpy.array(pmmap.paku_location(), dtype=numpy.float64)
+
+        self._compile_ghost_homes()
+
+        shape = (boards, self.ghost_count)
+        self.paku_pos = numpy.zeros((boards, 2))
+        self.ghost_pos = numpy.zeros(shape + (2,))
+        self.ghost_dir = numpy.full(shape, -1, dtype=numpy.int64)
+        self.ghost_trail = numpy.full(shape, -1, dtype=numpy.int64)
+        self.ghost_trail_step = numpy.zeros(shape, dtype=numpy.int64)
+        self.cookies = numpy.zeros((boards, cells), dtype=bool)
+        self.pills = numpy.zeros((boards, cells), dtype=bool)
+        self.remaining = numpy.zeros(boards, dtype=numpy.int64)
+        self.score = numpy.zeros(boards, dtype=numpy.int64)
+        self.retries = numpy.zeros(boards, dtype=numpy.int64)
+        self.empowered = numpy.zeros(boards, dtype=numpy.int64)
+        self.active = numpy.zeros(boards, dtype=bool)
+
+        self.reset()
+
+    def _compile_ghost_homes(self):
+        # Pairs of adjacent ghost box cells to place ghosts between, and the
+        # bread-crumb trail out of the box from each ghost box cell.
+        pmmap = self.map
+        homes = [tuple(g) for g in pmmap.ghost_locations()]
+        pairs = [
+            (a, b)
+            for a in homes
+            for b in homes
+            if abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+        ]
+        self.home_pairs = numpy.array(pairs, dtype=numpy.float64)
+
+        fields = pmmap.distance_fields(as_ghost=True)
+        exits = pmmap.ghost_exits()
+        trails = {}
+        for home in homes:
+            # as PacmanBoard.rehome_ghost; no trail if no exit is in reach
+            distances = {out: fields.distance(home, out) for out in exits}
+            reachable = [out for out, steps in distances.items() if steps is not None]
+            trail = []
+            if reachable:
+                trail = fields.trail(home, min(reachable, key=distances.get))
+            trails[home] = [tuple(cell) for cell in trail]
+
+        longest = max(1, max(len(t) for t in trails.values()))
+        self.trail_index = {home: i for i, home in enumerate(homes)}
+        self.trails = numpy.zeros((len(homes), longest, 2), dtype=numpy.float64)
+        self.trail_lengths = numpy.zeros(len(homes), dtype=numpy.int64)
+        for home, trail in trails.items():
+            i = self.trail_index[home]
+            self.trails[i, : len(trail)] = trail
+            self.trail_lengths[i] = len(trail)
+
+        # grid cell index -> trail index for rounding a location to its home
+        # (-1 where the trail is empty)
+        self.home_trail = numpy.full(self.width * self.height, -1, dtype=numpy.int64)
+        for (x, y), i in self.trail_index.items():
+            if self.trail_lengths[i]:
+                self.home_trail[y * self.width + x] = i
+
+    def reset(self, boards=None):
+        """
+        Start a new game on the boards selected by the mask or index array
+        `boards` (all boards by default).
+        """
+        if boards is None:
+            boards = numpy.ones(self.boards, dtype=bool)
+        boards = _as_mask(boards, self.boards)
+
+        self.cookies[boards] = self.start_cookies
+        self.pills[boards] = self.start_pills
+        self.remaining[boards] = self.start_cookies.sum() + self.start_pills.sum()
+        self.score[boards] = 0
+        self.retries[boards] = 3
+        self.empowered[boards] = 0
+        self.active[boards] = True
+        self._reset_characters(boards)
+
+    def _reset_characters(self, boards):
+        self.paku_pos[boards] = self.paku_start
+        rehome = numpy.zeros((self.boards, self.ghost_count), dtype=bool)
+        rehome[boards] = True
+        self._rehome_ghosts(rehome)
+
+    def _rehome_ghosts(self, mask):
+        count = int(mask.sum())
+        if count == 0:
+            return
+
+        pairs = self.home_pairs[self.rng.integers(len(self.home_pairs), size=count)]
+        offset = self.rng.random(count)[:, None]
+        positions = pairs[:, 1] + offset * (pairs[:, 0] - pairs[:, 1])
+
+        cells = numpy.floor(positions + 0.5).astype(numpy.int64)
+        homes = self.home_trail[cells[:, 1] * self.width + cells[:, 0]]
+
+        self.ghost_pos[mask] = positions
+        self.ghost_dir[mask] = -1
+        self.ghost_trail[mask] = homes
+        self.ghost_trail_step[mask] = 0
+
+    def _cells(self, pos):
+        cells = numpy.floor(pos + 0.5).astype(numpy.int64)
+        index = (cells[:, 1] % self.height) * self.width + cells[:, 0] % self.width
+        return cells, index
+
+    def _room(self, pos, dir_idx, rays, neighbours):
+        # Distance (after corner correction) to the center of the last open
+        # cell in each direction; the vector form of PacmanBoard._limit_towards.
+        cells, index = self._cells(pos)
+        offset = pos - cells
+        d = DIRS[dir_idx]
+        dx, dy = d[:, 0], d[:, 1]
+
+        steps = rays[dir_idx, index]
+
+        bits = neighbours[index]
+        side_x = numpy.sign(offset[:, 0]).astype(numpy.int64)
+        side_y = numpy.sign(offset[:, 1]).astype(numpy.int64)
+        corner_x = (dx == 0) & (numpy.abs(offset[:, 0]) > self.corner_correct)
+        corner_y = (dy == 0) & (numpy.abs(offset[:, 1]) > self.corner_correct)
+        blocked = corner_x & (bits & BITS[dy + 1, side_x + 1] != 0)
+        blocked |= corner_y & (bits & BITS[side_y + 1, dx + 1] != 0)
+        steps = numpy.where(blocked, 1, steps)
+
+        return steps - (offset[:, 0] * dx + offset[:, 1] * dy) - 1
+
+    def _wrap(self, pos):
+        for axis, size in ((0, self.width), (1, self.height)):
+            pos[:, axis] = numpy.where(
+                pos[:, axis] < -0.5, pos[:, axis] + size, pos[:, axis]
+            )
+            pos[:, axis] = numpy.where(
+                pos[:, axis] >= size - 0.5, pos[:, axis] - size, pos[:, axis]
+            )
+
+    def _move(self, pos, dir_idx, moving, rays, neighbours):
+        # the vector form of PacmanBoard._move_character; pos is updated
+        dir_idx = numpy.where(moving, dir_idx, 0)
+        d = DIRS[dir_idx]
+        cells = numpy.floor(pos + 0.5)
+
+        for axis in (0, 1):
+            push = moving & (d[:, axis] == 0)
+            push &= numpy.abs(pos[:, axis] - cells[:, axis]) <= self.corner_correct
+            pos[:, axis] = numpy.where(push, cells[:, axis], pos[:, axis])
+
+        room = self._room(pos, dir_idx, rays, neighbours)
+        distance = numpy.where(
+            moving & (room > 0), numpy.minimum(room, self.move_distance), 0
+        )
+        pos += d * distance[:, None]
+        self._wrap(pos)
+
+    def _ghost_logic(self, pos, current):
+        # the vector form of ghost_ootb.simple_logic
+        count = len(pos)
+        rooms = numpy.stack(
+            [
+                self._room(
+                    pos,
+                    numpy.full(count, i),
+                    self.ghost_rays,
+                    self.ghost_neighbours,
+                )
+                for i in range(len(DIRECTIONS))
+            ],
+            axis=1,
+        )
+        allowed = rooms > self.wall_bumper
+
+        keep = (current >= 0) & allowed[numpy.arange(count), numpy.maximum(current, 0)]
+
+        weights = self.rng.random((count, len(DIRECTIONS))) * allowed
+        choice = numpy.where(allowed.any(axis=1), weights.argmax(axis=1), -1)
+        return numpy.where(keep, current, choice)
+
+    def _follow_trails(self, pos, trail, step):
+        # the vector form of PacmanBoard.follow_breadcrumbs
+        target = self.trails[trail, step]
+        delta = target - pos
+        for axis, size in ((0, self.width), (1, self.height)):
+            delta[:, axis] = numpy.where(
+                delta[:, axis] > size / 2, delta[:, axis] - size, delta[:, axis]
+            )
+            delta[:, axis] = numpy.where(
+                delta[:, axis] < -size / 2, delta[:, axis] + size, delta[:, axis]
+            )
+
+        horizontal = numpy.abs(delta[:, 0]) >= numpy.abs(delta[:, 1])
+        minor = numpy.where(horizontal, delta[:, 1], delta[:, 0])
+        major = numpy.where(horizontal, delta[:, 0], delta[:, 1])
+        use_minor = numpy.abs(minor) > self.epsilon
+        amount = numpy.clip(
+            numpy.where(use_minor, minor, major),
+            -self.move_distance,
+            self.move_distance,
+        )
+        along_x = numpy.where(horizontal, ~use_minor, use_minor)
+
+        pos[:, 0] += numpy.where(along_x, amount, 0)
+        pos[:, 1] += numpy.where(along_x, 0, amount)
+        self._wrap(pos)
+
+        arrived = numpy.abs(pos - target).sum(axis=1) < self.epsilon
+        step = step + arrived
+        trail = numpy.where(step >= self.trail_lengths[trail], -1, trail)
+        return trail, step
+
+    def step(self, actions):
+        """
+        Advance every active board one iteration with paku heading in the
+        direction index `actions[board]` (into DIRECTIONS, -1 to stand
+        still).  Return the array of per board outcome codes.  Boards which
+        are cleared or lost become inactive until reset.
+        """
+        active = self.active.copy()
+        rules = core.PacmanBoard
+        boards = numpy.arange(self.boards)
+        paku_start = self.paku_pos.copy()
+        ghost_start = self.ghost_pos.copy()
+
+        # paku moves and eats
+        actions = numpy.asarray(actions)
+        self._move(
+            self.paku_pos,
+            actions,
+            active & (actions >= 0),
+            self.paku_rays,
+            self.paku_neighbours,
+        )
+        _, index = self._cells(self.paku_pos)
+
+        ate_cookie = active & self.cookies[boards, index]
+        ate_pill = active & self.pills[boards, index]
+        self.cookies[boards, index] &= ~ate_cookie
+        self.pills[boards, index] &= ~ate_pill
+        self.remaining -= ate_cookie + ate_pill
+        self.score += ate_cookie * rules.COOKIE_POINTS + ate_pill * rules.PILL_POINTS
+        self.empowered[ate_pill] = rules.EMPOWERED_ITERATIONS
+        self.empowered[active] = numpy.maximum(self.empowered[active] - 1, 0)
+
+        # ghosts move along their trail out of the box or by their logic
+        ghosts = self.ghost_pos.reshape(-1, 2)
+        trail = self.ghost_trail.reshape(-1)
+        trail_step = self.ghost_trail_step.reshape(-1)
+        ghost_active = numpy.repeat(active, self.ghost_count)
+
+        on_trail = ghost_active & (trail >= 0)
+        if on_trail.any():
+            pos = ghosts[on_trail]
+            new_trail, new_step = self._follow_trails(
+                pos, trail[on_trail], trail_step[on_trail]
+            )
+            ghosts[on_trail] = pos
+            trail[on_trail] = new_trail
+            trail_step[on_trail] = new_step
+
+        free = ghost_active & ~on_trail
+        if free.any():
+            directions = self.ghost_dir.reshape(-1)
+            choice = self._ghost_logic(ghosts[free], directions[free])
+            directions[free] = choice
+            pos = ghosts[free]
+            self._move(pos, choice, choice >= 0, self.ghost_rays, self.ghost_neighbours)
+            ghosts[free] = pos
+
+        outcomes = numpy.full(self.boards, PLAYING)
+
+        cleared = active & (self.remaining == 0)
+        outcomes[cleared] = CLEARED
+        playing = active & ~cleared
+
+        # collisions at any moment of the moves
+        distance = swept_separation(
+            paku_start[:, None, :],
+            self.paku_pos[:, None, :],
+            ghost_start,
+            self.ghost_pos,
+        )
+        close = (distance < self.collision_close) & playing[:, None]
+
+        empowered = self.empowered > 0
+        eaten = close & empowered[:, None]
+        if eaten.any():
+            self.score += eaten.sum(axis=1) * rules.GHOST_POINTS
+            self._rehome_ghosts(eaten)
+
+        caught = playing & ~empowered & close.any(axis=1)
+        lost = caught & (self.retries == 0)
+        caught &= ~lost
+        outcomes[caught] = CAUGHT
+        outcomes[lost] = LOST
+        self.retries -= caught
+        if caught.any():
+            self._reset_characters(caught)
+
+        self.active &= ~(cleared | lost)
+        return outcomes
+
+
+def _as_mask(selection, size):
+    selection = numpy.asarray(selection)
+    if selection.dtype == bool:
+        return selection
+    mask = numpy.zeros(size, dtype=bool)
+    mask[selection] = True
+    return mask
@@ -1,19 +1,169 @@
+import collections
 import os
 import pmlib
+from pmlib import consumption
 from PySide6 import QtCore, QtWidgets, QtGui
 
 ROOTDIR = os.path.dirname(os.path.dirname(os.path.normpath(__file__)))
 ARTDIR = os.path.join(ROOTDIR, "artwork")
 
 
+# The maze is drawn once into a background pixmap (per map, cell size and
+# device pixel ratio) holding the walls and the cookies & pills not yet
+# eaten.  Each frame only the rectangles of characters that moved and of
+# cells eaten since the last frame are invalidated; a paint copies those
+# parts of the background and draws the characters on top.
+#
+# The board zooms to fit the widget.  The background is painted in device
+# pixels from tiles scaled once to the cell size (ScaledTiles) and copied to
+# the screen 1:1.  While the widget is being resized the old background is
+# stretched over the new size and painted afresh once resizing settles.
+
+# preferred cell size (logical pixels) and the range of zoom
+CELL = 32
+MIN_CELL = 1
+MAX_CELL = 64
+
+# milliseconds after the last resize before the background is painted again
+RESIZE_SETTLE_MS = 150
+
+# ghost colors in the order of PacmanBoard.ghosts; blue while frightened
+GHOST_COLORS = ("cyan", "red", "pink", "orange")
+FRIGHTENED_COLOR = "blue"
+
+ARROWS = {
+    QtCore.Qt.Key.Key_Right: (1, 0),
+    QtCore.Qt.Key.Key_Down: (0, 1),
+    QtCore.Qt.Key.Key_Left: (-1, 0),
+    QtCore.Qt.Key.Key_Up: (0, -1),
+}
+
+
+def mask_to_suffix(cell):
+    ordered = [1, 2, 4, 8]
+    return "".join([str((cell & bit) // bit) for bit in ordered])
+
+
+class ScaledTiles:
+    """
+    Tiles smoothly scaled to a cell size once per (tile, cell size, device
+    pixel ratio), keeping the most recently used `cache_size`.  A tile is a
+    wall mask (0-15, see PacmanMap.wall_tiles), "cookie" or "pill".
+    """
+
+    CACHE_SIZE = 256
+    # edge of the artwork tiles
+    TILE_SIZE = 64
+
+    def __init__(self, cache_size=None):
+        self.cache_size = cache_size or self.CACHE_SIZE
+        self._sources = {}
+        self._scaled = collections.OrderedDict()
+
+    def source(self, tile):
+        pixmap = self._sources.get(tile)
+        if pixmap is None:
+            if isinstance(tile, int):
+                pngfile = os.path.join(ARTDIR, f"wall-{mask_to_suffix(tile)}.png")
+                pixmap = QtGui.QPixmap(pngfile)
+            else:
+                pixmap = self._consumable(tile)
+            self._sources[tile] = pixmap
+        return pixmap
+
+    def _consumable(self, tile):
+        size = self.TILE_SIZE
+        radius = size / 10 if tile == "cookie" else size / 4
+        pixmap = QtGui.QPixmap(size, size)
+        pixmap.fill(QtCore.Qt.GlobalColor.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.setPen(QtCore.Qt.PenStyle.NoPen)
+        painter.setBrush(QtGui.QColor("wheat"))
+        painter.drawEllipse(QtCore.QPointF(size / 2, size / 2), radius, radius)
+        painter.end()
+        return pixmap
+
+    def _cached(self, key, make):
+        pixmap = self._scaled.get(key)
+        if pixmap is not None:
+            self._scaled.move_to_end(key)
+            return pixmap
+
+        pixmap = make()
+        self._scaled[key] = pixmap
+        if len(self._scaled) > self.cache_size:
+            self._scaled.popitem(last=False)
+        return pixmap
+
+    def get(self, tile, cell, ratio):
+        """
+        Return `tile` scaled to `cell` logical pixels at device pixel ratio
+        `ratio` (the pixmap is in device pixels).
+        """
+
+        def make():
+            size = max(1, round(cell * ratio))
+            return self.source(tile).scaled(
+                size,
+                size,
+                QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                QtCore.Qt.TransformationMode.SmoothTransformation,
+            )
+
+        return self._cached((tile, cell, ratio), make)
+
+    def atlas(self, tiles, cell, ratio):
+        """
+        Return the scaled `tiles` side by side in one pixmap.
+        """
+        tiles = tuple(tiles)
+
+        def make():
+            size = max(1, round(cell * ratio))
+            atlas = QtGui.QPixmap(size * len(tiles), size)
+            atlas.fill(QtCore.Qt.GlobalColor.transparent)
+            painter = QtGui.QPainter(atlas)
+            for index, tile in enumerate(tiles):
+                painter.drawPixmap(index * size, 0, self.get(tile, cell, ratio))
+            painter.end()
+            return atlas
+
+        return self._cached((tiles, cell, ratio), make)
+
+
 class PacmanWidget(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super(PacmanWidget, self).__init__(parent)
 
-        self.setMinimumHeight(32 * 15)
-        self.setMinimumWidth(32 * 25)
+        self.setMinimumHeight(CELL * 15)
+        self.setMinimumWidth(CELL * 25)
+
+        self.tiles = ScaledTiles()
+        self._logic = None
+
+        # zoom:  cell size and the top left of the map in the widget
+        self.cell = CELL
+        self.origin = QtCore.QPoint(0, 0)
+        self._fitted = None
+
+        # background pixmap, its (map, cell size, ratio) key and the
+        # consumables drawn on it
+        self._background = None
+        self._background_key = None
+        self._drawn = None
+        self._drawn_remaining = 0
 
-        self._pixmaps = {}
+        self._resizing = False
+        self._settle = QtCore.QTimer(self)
+        self._settle.setSingleShot(True)
+        self._settle.setInterval(RESIZE_SETTLE_MS)
+        self._settle.timeout.connect(self._settled)
+
+        # character rectangles as last invalidated; paints draw these
+        self._character_rects = []
+        self._paku_cell = None
+        self._empowered = False
 
     @property
     def logic(self):
@@ -22,34 +172,232 @@ class PacmanWidget(QtWidgets.QWidget):
     @logic.setter
     def logic(self, v):
         self._logic = v
+        self._background = None
+        self._fitted = None
+        self._character_rects = []
         self.update()
 
     def cached_wall_pixmap(self, bits):
-        if bits not in self._pixmaps:
-            pngfile = os.path.join(ARTDIR, f"wall-{bits}.png")
-            self._pixmaps[bits] = QtGui.QPixmap(pngfile)
-
-        return self._pixmaps[bits]
-
-    def paintEvent(self, e):
-        painter = QtGui.QPainter(self)
+        return self.tiles.source(int(bits[::-1], 2))
+
+    def fit(self):
+        """
+        Zoom the map to fit the widget; returns True if the zoom changed.
+        """
+        board = self.logic
+        size = self.size()
+        if board is None or board.map is None or self._fitted == size:
+            return False
+        self._fitted = size
+
+        pmmap = board.map
+        cell = min(size.width() // pmmap.width, size.height() // pmmap.height)
+        cell = max(MIN_CELL, min(MAX_CELL, cell))
+        origin = QtCore.QPoint(
+            max(0, (size.width() - pmmap.width * cell) // 2),
+            max(0, (size.height() - pmmap.height * cell) // 2),
+        )
+        if cell == self.cell and origin == self.origin:
+            return False
+        self.cell = cell
+        self.origin = origin
+        self._character_rects = self._current_rects(board)
+        return True
+
+    def resizeEvent(self, e):
+        super(PacmanWidget, self).resizeEvent(e)
+        if self.fit() and self._background is not None:
+            self._resizing = True
+            self._settle.start()
+        self.update()
 
-        def paint_cell(cx, cy, pixmap):
-            painter.drawPixmap(cx * 32, cy * 32, 32, 32, pixmap)
+    def _settled(self):
+        self._resizing = False
+        self.update()
 
-        def mask_to_suffix(cell):
-            ordered = [1, 2, 4, 8]
-            return "".join([str((cell & bit) // bit) for bit in ordered])
+    def cell_rect(self, x, y):
+        cell = self.cell
+        return QtCore.QRect(
+            self.origin.x() + x * cell, self.origin.y() + y * cell, cell, cell
+        )
+
+    def background(self):
+        """
+        Return the background pixmap and the (map, cell size, ratio) it was
+        painted for, which is out of date while resizing.
+        """
+        board = self.logic
+        key = (board.map, self.cell, self.devicePixelRatioF())
+        stale = self._background_key != key and not self._resizing
+        if self._background is None or stale:
+            self._background = self._paint_background(board, *key[1:])
+            self._background_key = key
+            self._paku_cell = None
+        return self._background, self._background_key
+
+    def _paint_background(self, board, cell, ratio):
+        pmmap = board.map
+        consumables = board.consumables
+        size = max(1, round(cell * ratio))
+
+        pixmap = QtGui.QPixmap(pmmap.width * size, pmmap.height * size)
+        pixmap.fill(QtGui.QColor("black"))
+        painter = QtGui.QPainter(pixmap)
+        draw = painter.drawPixmap
+
+        # walls are copied 1:1 out of the atlas of scaled tiles (PySide6
+        # does not take a list of fragments for drawPixmapFragments)
+        atlas = self.tiles.atlas(range(16), cell, ratio)
+        tiles = pmmap.wall_tiles()
+        width = pmmap.width
+        for x, y in pmmap.element_locations(pmmap.WALL):
+            draw(x * size, y * size, atlas, tiles[y * width + x] * size, 0, size, size)
+
+        # and the cookies & pills still to eat
+        for kind, tile in ((consumption.COOKIE, "cookie"), (consumption.PILL, "pill")):
+            tile = self.tiles.get(tile, cell, ratio)
+            for x, y in consumables.locations(kind):
+                draw(x * size, y * size, tile)
+        painter.end()
+
+        self._drawn = bytearray(consumables.cells)
+        self._drawn_remaining = consumables.remaining
+        return pixmap
+
+    def _erase_eaten(self, board):
+        # Only paku eats, so the cells to check are those it crossed since
+        # the last frame.  A board which gained consumables (restored or
+        # started over) has its background painted again.
+        consumables = board.consumables
+        if consumables.remaining > self._drawn_remaining:
+            self._background = None
+            self.update()
+            return
+
+        cell = board.paku.location.rounded()
+        last = cell if self._paku_cell is None else self._paku_cell
+        self._paku_cell = cell
+        if consumables.remaining == self._drawn_remaining:
+            return
+
+        width = board.map.width
+        cells = consumables.cells
+        drawn = self._drawn
+        if (cell - last).manhattan() > 1:
+            crossed = [last, cell]
+        else:
+            crossed = [
+                (x, y)
+                for x in range(min(last.x, cell.x), max(last.x, cell.x) + 1)
+                for y in range(min(last.y, cell.y), max(last.y, cell.y) + 1)
+            ]
+
+        # the background may be for another size while resizing
+        _, cell, ratio = self._background_key
+        size = max(1, round(cell * ratio))
+
+        painter = None
+        for x, y in crossed:
+            offset = y * width + x
+            if drawn[offset] != cells[offset]:
+                if painter is None:
+                    painter = QtGui.QPainter(self._background)
+                drawn[offset] = cells[offset]
+                self._drawn_remaining -= 1
+                painter.fillRect(x * size, y * size, size, size, QtGui.QColor("black"))
+                self.update(self.cell_rect(x, y))
+        if painter is not None:
+            painter.end()
+
+        # eaten out of sight of the check; paint the background afresh
+        if self._drawn_remaining != consumables.remaining:
+            self._background = None
+            self.update()
+
+    def _current_rects(self, board):
+        cell = self.cell
+        left, top = self.origin.x(), self.origin.y()
+        rects = []
+        for character in [board.paku] + board.ghosts:
+            location = board.interpolated_location(character)
+            rects.append(
+                QtCore.QRect(
+                    left + round(location.x * cell),
+                    top + round(location.y * cell),
+                    cell,
+                    cell,
+                )
+            )
+        return rects
+
+    def render_changes(self, board):
+        """
+        Invalidate what changed on `board` since the last frame; use as the
+        `render` callback of pmlib.play.
+        """
+        if board is not self._logic or self._background is None:
+            self.logic = board
+            self._character_rects = self._current_rects(board)
+            return
+
+        self._erase_eaten(board)
+
+        # ghosts change color when paku is empowered
+        recolor = board.empowered != self._empowered
+        self._empowered = board.empowered
+
+        rects = self._current_rects(board)
+        previous = self._character_rects
+        self._character_rects = rects
+        for index, rect in enumerate(rects):
+            unchanged = index < len(previous) and previous[index] == rect
+            if unchanged and not (recolor and index > 0):
+                continue
+            if index < len(previous):
+                self.update(previous[index])
+            self.update(rect)
 
-        pmmap = self.logic.map
+    def paintEvent(self, e):
+        board = self.logic
+        if board is None or board.map is None:
+            return
 
-        for ii in range(pmmap.width):
-            for jj in range(pmmap.height):
-                cell = pmmap[ii, jj]
+        self.fit()
+        if not self._character_rects:
+            self._character_rects = self._current_rects(board)
 
-                if cell & pmmap.WALL != 0:
-                    suffix = mask_to_suffix(cell)
-                    paint_cell(ii, jj, self.cached_wall_pixmap(suffix))
+        painter = QtGui.QPainter(self)
+        rect = e.rect()
+        painter.fillRect(rect, QtGui.QColor("black"))
+
+        # background pixels per logical pixel; only a stale background
+        # while resizing is not copied 1:1
+        background, (_, cell, ratio) = self.background()
+        scale = max(1, round(cell * ratio)) / self.cell
+        target = rect.intersected(QtCore.QRect(self.origin, background.size() / scale))
+        source = QtCore.QRectF(
+            (target.x() - self.origin.x()) * scale,
+            (target.y() - self.origin.y()) * scale,
+            target.width() * scale,
+            target.height() * scale,
+        )
+        painter.drawPixmap(QtCore.QRectF(target), background, source)
+
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.setPen(QtCore.Qt.PenStyle.NoPen)
+        colors = ["yellow"]
+        for index in range(len(board.ghosts)):
+            if board.empowered:
+                colors.append(FRIGHTENED_COLOR)
+            else:
+                colors.append(GHOST_COLORS[index % len(GHOST_COLORS)])
+        margin = self.cell // 16
+        for character_rect, color in zip(self._character_rects, colors):
+            if character_rect.intersects(rect):
+                painter.setBrush(QtGui.QColor(color))
+                painter.drawEllipse(
+                    character_rect.adjusted(margin, margin, -margin, -margin)
+                )
 
     def _unused_example(self, paint_cell):
         paint_cell(2, 2, self.cached_wall_pixmap("0110"))
@@ -104,6 +452,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self.board = PacmanWidget()
         self.mainlay.addWidget(self.board)
 
+        # paku goes the way of the last arrow key pressed
+        self.direction = None
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(round(pmlib.PacmanBoard.LOOP_SLEEP_SECONDS * 1000))
+        self.timer.timeout.connect(self.step)
+
         self.new()
 
     def make_menu_bar(self):
@@ -118,7 +474,24 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.logic.load_from_string(pmlib.level1)
 
+        self.logic.paku.logic = lambda board, location, state: self.direction
+        self.direction = None
+
         self.board.logic = self.logic
+        self.timer.start()
+
+    def step(self):
+        outcome = self.logic.tick()
+        self.board.render_changes(self.logic)
+        if outcome in (pmlib.core.CLEARED, pmlib.core.LOST):
+            self.timer.stop()
+
+    def keyPressEvent(self, e):
+        direction = ARROWS.get(e.key())
+        if direction is None:
+            super(MainWindow, self).keyPressEvent(e)
+        else:
+            self.direction = direction
 
 
 def main():
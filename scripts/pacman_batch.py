@@ -0,0 +1,73 @@
+import argparse
+import importlib
+import json
+import sys
+import pmlib
+from pmlib import batch
+from pmlib import maps
+from pmlib import mazegen
+from pmlib import paku_ootb
+
+
+def load_logic(spec):
+    # spec is module:function
+    module, _, function = spec.partition(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def load_map(name):
+    if name == "level1":
+        return pmlib.level1
+    if name == "simple":
+        return maps.SIMPLE_TEST
+    if name.startswith("maze:"):
+        # maze:WIDTHxHEIGHT[:SEED]
+        _, size, *seed = name.split(":")
+        width, height = (int(edge) for edge in size.split("x"))
+        return mazegen.generate(width, height, seed=int(seed[0]) if seed else 0)
+    with open(name) as mapfile:
+        return mapfile.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless pacman games in bulk")
+    parser.add_argument(
+        "--map", default="level1", help="level1, simple, maze:WxH[:SEED] or a map file"
+    )
+    parser.add_argument("--paku", default=None, help="paku logic as module:function")
+    parser.add_argument("--ghost", default=None, help="ghost logic as module:function")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--max-ticks", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="print each game as JSON")
+    args = parser.parse_args()
+
+    paku_logic = load_logic(args.paku) if args.paku else paku_ootb.wander_logic
+    ghost_logic = load_logic(args.ghost) if args.ghost else None
+    name = args.paku or "wander"
+
+    stats = batch.BatchStats()
+    results = batch.run_batch(
+        load_map(args.map),
+        {name: (paku_logic, ghost_logic)},
+        range(args.seed, args.seed + args.games),
+        processes=args.processes,
+        chunksize=args.chunksize,
+        max_ticks=args.max_ticks,
+        stats=stats,
+    )
+
+    for entry in results:
+        if args.json:
+            record = {"entrant": entry.entrant, "seed": entry.seed}
+            record.update(entry.result._asdict())
+            print(json.dumps(record))
+
+    json.dump(stats.as_dict(), sys.stderr if args.json else sys.stdout, indent=2)
+    print(file=sys.stderr if args.json else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()